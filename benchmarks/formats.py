@@ -0,0 +1,121 @@
+"""Load/save time and file size of each storage format.
+
+Encodes the files a guild's data directory holds (leaderboard, challenges,
+all-time totals, one archived month) for synthetic guilds of each size and
+prints one JSON document:
+
+    python -m benchmarks.formats --sizes 1000 10000 --output formats.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.storage import make_members, write_dataset, _stats, _commit
+from utils import formats
+from utils.constants import LEADERBOARD_FILE, CHALLENGES_FILE, ALL_TIME_FILE, HALL_OF_FAME_DIR
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+
+def available_formats():
+    available = []
+    for storage_format in formats.FORMATS:
+        try:
+            formats.check_format(storage_format)
+        except RuntimeError:
+            continue
+        available.append(storage_format)
+    return available
+
+def load_files(data_dir):
+    archive_dir = os.path.join(data_dir, HALL_OF_FAME_DIR)
+    month_file = sorted(os.listdir(archive_dir))[-1]
+    files = {}
+    for name, path in (
+        (LEADERBOARD_FILE, os.path.join(data_dir, LEADERBOARD_FILE)),
+        (CHALLENGES_FILE, os.path.join(data_dir, CHALLENGES_FILE)),
+        (ALL_TIME_FILE, os.path.join(data_dir, ALL_TIME_FILE)),
+        (f'{HALL_OF_FAME_DIR}/{month_file}', os.path.join(archive_dir, month_file)),
+    ):
+        with open(path, 'rb') as f:
+            files[name] = formats.loads(f.read())
+    return files
+
+def _time_repeat(call, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - started)
+    return _stats(samples)
+
+def bench_size(size, repeat, seed):
+    rng = random.Random(seed)
+    data_dir = tempfile.mkdtemp(prefix=f'talait-formats-{size}-')
+    try:
+        write_dataset(data_dir, make_members(size, rng), rng)
+        files = load_files(data_dir)
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    results = {}
+    for storage_format in available_formats():
+        per_file = {}
+        for name, data in files.items():
+            raw = formats.dumps(data, storage_format)
+            per_file[name] = {
+                'bytes': len(raw),
+                'save': _time_repeat(lambda: formats.dumps(data, storage_format), repeat),
+                'load': _time_repeat(lambda: formats.loads(raw), repeat),
+            }
+        results[storage_format] = {
+            'total_bytes': sum(entry['bytes'] for entry in per_file.values()),
+            'total_save_ms': sum(entry['save']['p50_us'] for entry in per_file.values()) / 1e3,
+            'total_load_ms': sum(entry['load']['p50_us'] for entry in per_file.values()) / 1e3,
+            'files': per_file,
+        }
+    return results
+
+def run(sizes, repeat, seed):
+    report = {
+        'meta': {
+            'commit': _commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'started_at': datetime.now().isoformat(),
+            'orjson': formats.orjson is not None,
+            'msgpack': formats.msgpack is not None,
+            'repeat': repeat,
+            'seed': seed,
+        },
+        'results': {}
+    }
+    for size in sizes:
+        print(f'⏱️ formats: {size} users...', file=sys.stderr)
+        report['results'][str(size)] = bench_size(size, repeat, seed)
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--repeat', type=int, default=5, help='encodes/decodes timed per file and format')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='write JSON here instead of stdout')
+    args = parser.parse_args()
+
+    report = run(args.sizes, args.repeat, args.seed)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+if __name__ == '__main__':
+    main()
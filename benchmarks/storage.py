@@ -0,0 +1,253 @@
+"""Micro-benchmarks for the storage and ranking hot paths.
+
+Runs fully offline against synthetic guild data (fake Discord members,
+weekly challenges with submissions, archived months) and prints one JSON
+document, so two commits can be compared by diffing their results:
+
+    python -m benchmarks.storage --sizes 1000 10000 --output before.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+
+from utils.archive import MonthArchive
+from utils.constants import (
+    LEADERBOARD_FILE, CHALLENGES_FILE, ALL_TIME_FILE, HALL_OF_FAME_DIR, SUBMISSIONS_DIR
+)
+from utils.storage import create_data_manager
+from utils.xp_series import week_key
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+CHALLENGE_WEEKS = 26
+ARCHIVED_MONTHS = 6
+SUBMISSION_RATE = 0.1  # share of users submitting to each challenge
+
+class FakeMember:
+    """Just enough of discord.Member for the DataManager call sites."""
+
+    def __init__(self, member_id, name):
+        self.id = member_id
+        self.name = name
+        self.display_name = name
+        self.bot = False
+
+def make_members(count, rng):
+    return [FakeMember(10**17 + rng.randrange(10**17), f'member{n}') for n in range(count)]
+
+def _weeks_back(count):
+    year, week, _ = date.today().isocalendar()
+    monday = date.fromisocalendar(year, week, 1).toordinal()
+    return [date.fromordinal(monday - 7 * n).isocalendar()[:2] for n in range(count)][::-1]
+
+def write_dataset(data_dir, members, rng):
+    """Write a guild's data files directly, in the on-disk schema."""
+    weeks = _weeks_back(CHALLENGE_WEEKS)
+
+    leaderboard = {}
+    for member in members:
+        active_weeks = rng.sample(weeks, rng.randint(0, 8))
+        weekly_xp = {week_key(year, week): rng.choice([2, 2, 2, 5, 7, 10]) for year, week in active_weeks}
+        xp = sum(weekly_xp.values())
+        leaderboard[str(member.id)] = {
+            'username': member.name,
+            'xp': xp,
+            'weekly_xp': weekly_xp,
+            'total_xp': xp,
+            'badges': [f'🥇 Winner W{week}' for _, week in active_weeks[:rng.choice([0, 0, 0, 1, 2])]]
+        }
+
+    challenges = []
+    submissions_dir = os.path.join(data_dir, SUBMISSIONS_DIR)
+    os.makedirs(submissions_dir, exist_ok=True)
+    message_id = 10**18
+    for challenge_id, (year, week) in enumerate(weeks, 1):
+        challenges.append({
+            'id': challenge_id,
+            'title': f'Challenge {challenge_id}',
+            'description': 'Synthetic benchmark challenge',
+            'difficulty': 'Medium',
+            'week': week,
+            'year': year,
+            'posted_by': members[0].id,
+            'posted_at': datetime.fromisocalendar(year, week, 5).isoformat(),
+            'status': 'active' if challenge_id == len(weeks) else 'closed',
+            'message_id': challenge_id,
+            'channel_id': 1
+        })
+        with open(os.path.join(submissions_dir, f'{challenge_id}.jsonl'), 'w', encoding='utf-8') as f:
+            for member in rng.sample(members, int(len(members) * SUBMISSION_RATE)):
+                message_id += 1
+                f.write(json.dumps({
+                    'user_id': member.id,
+                    'message_id': message_id,
+                    'channel_id': 2,
+                    'submitted_at': datetime.fromisocalendar(year, week, 6).isoformat()
+                }, separators=(',', ':')) + '\n')
+
+    archive_dir = os.path.join(data_dir, HALL_OF_FAME_DIR)
+    os.makedirs(archive_dir, exist_ok=True)
+    all_time = {'months': [], 'users': {}}
+    for month in range(1, ARCHIVED_MONTHS + 1):
+        month_key = f'2000-{month:02d}'
+        users = MonthArchive.compact({
+            user_id: {'username': data['username'], 'xp': rng.randint(0, 60)}
+            for user_id, data in leaderboard.items()
+        })
+        with open(os.path.join(archive_dir, f'{month_key}.json'), 'w') as f:
+            json.dump(users, f, separators=(',', ':'))
+        all_time['months'].append(month_key)
+        for user_id, data in users.items():
+            entry = all_time['users'].setdefault(user_id, {'username': data['username'], 'total_xp': 0})
+            entry['total_xp'] += data['xp']
+
+    for filename, data in ((LEADERBOARD_FILE, leaderboard), (CHALLENGES_FILE, challenges), (ALL_TIME_FILE, all_time)):
+        with open(os.path.join(data_dir, filename), 'w') as f:
+            json.dump(data, f, indent=4)
+
+def _stats(samples):
+    samples = sorted(samples)
+    return {
+        'ops': len(samples),
+        'total_ms': sum(samples) * 1e3,
+        'mean_us': statistics.fmean(samples) * 1e6,
+        'p50_us': samples[len(samples) // 2] * 1e6,
+        'p95_us': samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1e6,
+        'max_us': samples[-1] * 1e6,
+    }
+
+def _time_each(calls):
+    samples = []
+    for call in calls:
+        started = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - started)
+    return _stats(samples)
+
+def _time_once(call):
+    started = time.perf_counter()
+    result = call()
+    return _stats([time.perf_counter() - started]), result
+
+async def bench_size(backend, size, ops, seed):
+    rng = random.Random(seed)
+    members = make_members(size, rng)
+    newcomers = make_members(ops, rng)
+    results = {}
+
+    data_dir = tempfile.mkdtemp(prefix=f'talait-bench-{size}-')
+    data_manager = None
+    try:
+        write_dataset(data_dir, members, rng)
+        if backend == 'sqlite':
+            # SQLite starts from the same files, imported once outside the timings
+            from utils.sqlite_storage import migrate_from_json
+            migrate_from_json(data_dir)
+
+        results['load'], data_manager = _time_once(lambda: create_data_manager(backend, data_dir))
+
+        sample = [rng.choice(members) for _ in range(ops)]
+        this_week = week_key(*date.today().isocalendar()[:2])
+        active = data_manager.get_active_challenge()
+
+        results['ensure_user_existing'] = _time_each(
+            lambda member=member: data_manager.ensure_user(member.id, member.name) for member in sample
+        )
+        results['ensure_user_new'] = _time_each(
+            lambda member=member: data_manager.ensure_user(member.id, member.name) for member in newcomers
+        )
+        results['add_xp'] = _time_each(
+            lambda member=member: data_manager.add_xp(member.id, 2, this_week) for member in sample
+        )
+        results['get_user_rank'] = _time_each(
+            lambda member=member: data_manager.get_user_rank(member.id) for member in sample
+        )
+        results['add_submission'] = _time_each(
+            lambda member=member, n=n: data_manager.add_submission(active['id'], {
+                'user_id': member.id,
+                'message_id': 2 * 10**18 + n,
+                'channel_id': 2,
+                'submitted_at': datetime.now().isoformat()
+            })
+            for n, member in enumerate(sample)
+        )
+        results['leaderboard_top10'] = _time_each(
+            lambda: data_manager.get_top_users(10) for _ in range(min(ops, 100))
+        )
+        results['leaderboard_snapshot'], _ = _time_once(data_manager.get_leaderboard_snapshot)
+        results['period_snapshot_4_weeks'], _ = _time_once(
+            lambda: data_manager.get_period_snapshot(week_key(*_weeks_back(4)[0]), this_week)
+        )
+        results['hall_of_fame_top10'] = _time_each(
+            lambda: data_manager.get_all_time_top(10) for _ in range(min(ops, 100))
+        )
+        results['hall_of_fame_snapshot'], _ = _time_once(data_manager.get_all_time_snapshot)
+        results['flush'], _ = _time_once(lambda: data_manager.flush_sync())
+        results['reset_monthly_leaderboard'], _ = _time_once(data_manager.reset_monthly_leaderboard)
+        await data_manager.flush()
+
+        if backend == 'json':
+            snapshot_stats, snapshot = _time_once(data_manager._snapshot)
+            results['save_snapshot_copy'] = snapshot_stats
+            results['save_snapshot_write'], _ = _time_once(lambda: data_manager._write_snapshot(snapshot))
+    finally:
+        if hasattr(data_manager, 'close'):
+            data_manager.close()
+        shutil.rmtree(data_dir, ignore_errors=True)
+    return results
+
+def _commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+async def run(backend, sizes, ops, seed):
+    report = {
+        'meta': {
+            'commit': _commit(),
+            'backend': backend,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'started_at': datetime.now().isoformat(),
+            'ops_per_path': ops,
+            'seed': seed,
+        },
+        'results': {}
+    }
+    for size in sizes:
+        print(f'⏱️ {backend}: {size} users...', file=sys.stderr)
+        report['results'][str(size)] = await bench_size(backend, size, ops, seed)
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--backend', choices=['json', 'sqlite'], default='json')
+    parser.add_argument('--ops', type=int, default=1000, help='calls timed per measured path')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='write JSON here instead of stdout')
+    args = parser.parse_args()
+
+    # Inside a running loop the JSON backend uses its write-behind path, as in the bot
+    report = asyncio.run(run(args.backend, args.sizes, args.ops, args.seed))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,38 @@
+import asyncio
+import time
 import discord
 from discord.ext import commands
+from discord import app_commands
 import os
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from utils.data_manager import DataManager
+from utils.command_sync import sync_command_tree
+from utils.constants import (
+    DATA_DIR, STORAGE_BACKEND, STORAGE_FORMAT,
+    COMMAND_TREE_STATE_FILE, SCHEDULER_STATE_FILE, GUILD_SETTINGS_FILE,
+    BROADCAST_CONCURRENCY, BROADCAST_RATE, BROADCAST_RETRIES, BROADCAST_BACKOFF,
+    METRICS_FILE, METRICS_SAMPLE_INTERVAL, METRICS_WRITE_EVERY,
+    PROFILES_DIR, PROFILE_SAMPLE_INTERVAL, SLOW_CALLBACK_THRESHOLD,
+    AUTO_DEFER_AFTER, COMMAND_WORKERS
+)
+from utils.broadcast import Broadcaster
+from utils.channel_index import ChannelIndex
+from utils.guild_data import GuildDataRegistry
+from utils.guild_settings import GuildSettings
+from utils.interactions import arm_auto_defer, disarm
+from utils.metrics import registry, MetricsReporter
+from utils.permissions import RoleAuthorizer
+from utils.profiler import LoopWatchdog, SamplingProfiler
+from utils.scheduler import Scheduler
+
+STARTED_AT = time.perf_counter()
+
+EXTENSIONS = [
+    'cogs.challenges',
+    'cogs.leaderboard',
+    'cogs.admin',
+    'cogs.help',
+]
 
 # Load environment variables
 load_dotenv()
@@ -13,49 +43,145 @@ intents.message_content = True
 intents.members = True
 intents.reactions = True
 
-bot = commands.Bot(command_prefix='!', intents=intents)
+class InstrumentedTree(app_commands.CommandTree):
+    """Command tree running shared middleware before every slash command.
 
-# Initialize data manager
-data_manager = DataManager()
-bot.data_manager = data_manager
+    Each command is stamped so its latency can be recorded, gets deferred
+    automatically if it hasn't answered within AUTO_DEFER_AFTER, and finds
+    its guild's shard already opened (on a worker thread, not the loop).
+    """
 
-@bot.event
-async def on_ready():
-    print(f'✅ {bot.user} is now online!')
-    print(f'📊 Bot ID: {bot.user.id}')
-    print(f'🏠 Servers: {len(bot.guilds)}')
-    print('='*50)
-    
+    async def interaction_check(self, interaction: discord.Interaction):
+        interaction.extras['started'] = time.perf_counter()
+        arm_auto_defer(interaction, AUTO_DEFER_AFTER)
+        if interaction.guild_id is not None:
+            await self.client.guild_data.load(interaction.guild_id, self.client.workers)
+        return True
+
+    async def on_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        disarm(interaction)
+        command = interaction.command.qualified_name if interaction.command else 'unknown'
+        registry.inc('command_errors_total', command=command)
+        await super().on_error(interaction, error)
+
+bot = commands.Bot(command_prefix='!', intents=intents, tree_cls=InstrumentedTree)
+
+# Initialize per-guild data; each guild's shard is loaded on first use
+guild_data = GuildDataRegistry(
+    DATA_DIR,
+    os.getenv('STORAGE_BACKEND', STORAGE_BACKEND),
+    legacy_guild_id=os.getenv('LEGACY_GUILD_ID'),
+    storage_format=os.getenv('STORAGE_FORMAT', STORAGE_FORMAT)
+)
+bot.guild_data = guild_data
+bot.command_tree_state = os.path.join(DATA_DIR, COMMAND_TREE_STATE_FILE)
+bot.first_ready_done = False
+
+# Threads that open guild shards off the event loop
+bot.workers = ThreadPoolExecutor(COMMAND_WORKERS, thread_name_prefix='shard-loader')
+
+# Exact-time jobs (weekly announcements, monthly resets) registered by the cogs
+bot.guild_settings = GuildSettings(os.path.join(DATA_DIR, GUILD_SETTINGS_FILE))
+bot.scheduler = Scheduler(os.path.join(DATA_DIR, SCHEDULER_STATE_FILE))
+
+# Exercise/submission channel IDs per guild, kept current by channel events
+bot.channel_index = ChannelIndex(bot.guild_settings)
+
+# Trainer/admin checks from per-guild role IDs, cached per member
+bot.authorizer = RoleAuthorizer(bot.guild_settings)
+
+# Loop lag sampling and the periodic metrics file
+bot.metrics_reporter = MetricsReporter(
+    os.path.join(DATA_DIR, METRICS_FILE), METRICS_SAMPLE_INTERVAL, METRICS_WRITE_EVERY
+)
+
+# Always-on stall detector, plus the on-demand profiler behind /profile
+bot.loop_watchdog = LoopWatchdog(float(os.getenv('SLOW_CALLBACK_THRESHOLD', SLOW_CALLBACK_THRESHOLD)))
+bot.profiler = SamplingProfiler(os.path.join(DATA_DIR, PROFILES_DIR), PROFILE_SAMPLE_INTERVAL)
+
+# Every announcement goes through one shared send budget
+bot.broadcaster = Broadcaster(BROADCAST_CONCURRENCY, BROADCAST_RATE, BROADCAST_RETRIES, BROADCAST_BACKOFF)
+
+async def sync_commands():
+    started = time.perf_counter()
     try:
-        synced = await bot.tree.sync()
-        print(f'✅ Synced {len(synced)} slash command(s)')
+        synced = await sync_command_tree(
+            bot.tree, bot.command_tree_state, force=os.getenv('FORCE_COMMAND_SYNC') == '1'
+        )
     except Exception as e:
         print(f'❌ Error syncing commands: {e}')
-    
+        return
+    if synced is None:
+        print('✅ Slash commands unchanged, skipped sync')
+    else:
+        print(f'✅ Synced {synced} slash command(s) in {time.perf_counter() - started:.2f}s')
+
+@bot.event
+async def on_ready():
     # Set bot status
-    await bot.change_presence(
+    presence = bot.change_presence(
         activity=discord.Activity(
             type=discord.ActivityType.watching,
             name="talAIt challenges | /help"
         )
     )
 
+    # on_ready fires again after gateway reconnects; only the first one does startup work
+    if bot.first_ready_done:
+        await presence
+        print(f'🔄 Reconnected to {len(bot.guilds)} server(s)')
+        return
+    bot.first_ready_done = True
+
+    print(f'✅ {bot.user} is now online!')
+    print(f'📊 Bot ID: {bot.user.id}')
+    print(f'🏠 Servers: {len(bot.guilds)}')
+    print(f'⏱️ Ready {time.perf_counter() - STARTED_AT:.2f}s after start')
+    print('='*50)
+
+    # Before any guild opens its shard: an upgraded single-guild install keeps its data
+    await guild_data.adopt_legacy([guild.id for guild in bot.guilds], bot.workers)
+    bot.scheduler.start()
+    bot.metrics_reporter.start()
+    bot.loop_watchdog.start()
+    await asyncio.gather(presence, sync_commands())
+
+@bot.event
+async def on_app_command_completion(interaction, command):
+    disarm(interaction)
+    cog = type(command.binding).__name__ if command.binding else 'none'
+    registry.inc('commands_total', command=command.qualified_name, cog=cog)
+    started = interaction.extras.get('started')
+    if started is not None:
+        registry.observe('command_latency_seconds', time.perf_counter() - started,
+                         command=command.qualified_name, cog=cog)
+
 @bot.event
 async def on_guild_join(guild):
     print(f'✅ Joined new server: {guild.name} (ID: {guild.id})')
 
 async def load_cogs():
-    await bot.load_extension('cogs.challenges')
-    await bot.load_extension('cogs.leaderboard')
-    await bot.load_extension('cogs.admin')
-    await bot.load_extension('cogs.help')
-    print('✅ All cogs loaded successfully!')
+    started = time.perf_counter()
+    await asyncio.gather(*(bot.load_extension(extension) for extension in EXTENSIONS))
+    print(f'✅ All cogs loaded successfully in {time.perf_counter() - started:.2f}s!')
 
 async def main():
     async with bot:
         await load_cogs()
-        await bot.start(os.getenv('DISCORD_TOKEN'))
+        try:
+            await bot.start(os.getenv('DISCORD_TOKEN'))
+        finally:
+            # Unloading the cogs drains the submission queue into the shards,
+            # so it has to happen before the final flush
+            await bot.close()
+            bot.scheduler.stop()
+            bot.guild_settings.flush_sync()
+            bot.metrics_reporter.stop()
+            bot.loop_watchdog.stop()
+            # Persist anything still waiting in the write-behind buffer
+            await guild_data.flush()
+            bot.workers.shutdown()
+            guild_data.close()
 
 if __name__ == '__main__':
-    import asyncio
     asyncio.run(main())
\ No newline at end of file
@@ -1,64 +1,282 @@
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
 from discord import app_commands
-from datetime import datetime
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from utils.command_sync import sync_command_tree
+from utils.embeds import create_botstats_embed
+from utils.interactions import respond, defer
+from utils.metrics import registry, STARTED
+from utils.permissions import ADMIN, TRAINER
+from utils.constants import MONTHLY_RESET_DAY, MONTHLY_RESET_HOUR, PROFILE_MAX_SECONDS
+from utils.scheduler import MonthlySchedule
+
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+def month_key(moment, tz_name=None):
+    local = moment.astimezone(ZoneInfo(tz_name) if tz_name else None)
+    return f'{local.year}-{local.month:02d}'
 
 class Admin(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.data_manager = bot.data_manager
-        self.monthly_reset.start()
+        self.guild_data = bot.guild_data
+        self.guild_settings = bot.guild_settings
+        self.scheduler = bot.scheduler
+        self.channel_index = bot.channel_index
+        self.authorizer = bot.authorizer
 
     def cog_unload(self):
-        self.monthly_reset.cancel()
+        # Keep the persisted next runs so missed resets still catch up after a restart
+        for guild in self.bot.guilds:
+            self.scheduler.remove_job(f'monthly_reset:{guild.id}', keep_state=True)
 
     @app_commands.command(name='removexp', description='Remove XP from a user')
     @app_commands.describe(user='The user to remove XP from', amount='Amount of XP to remove')
     async def remove_xp(self, interaction: discord.Interaction, user: discord.Member, amount: int):
-        allowed_roles = ['formateur', 'admin', 'moderator']
-        if not any(role.name.lower() in allowed_roles for role in interaction.user.roles):
-            await interaction.response.send_message('❌ You do not have permission to use this command.', ephemeral=True)
+        if not self.authorizer.has(interaction.user, TRAINER):
+            await respond(interaction, '❌ You do not have permission to use this command.', ephemeral=True)
             return
         
-        user_data = self.data_manager.get_user(user.id)
+        data_manager = self.guild_data.for_guild(interaction.guild_id)
+        user_data = data_manager.get_user(user.id)
         
         if not user_data:
-            await interaction.response.send_message('❌ User not found in leaderboard!', ephemeral=True)
+            await respond(interaction, '❌ User not found in leaderboard!', ephemeral=True)
             return
         
-        self.data_manager.remove_xp(user.id, amount)
-        updated_data = self.data_manager.get_user(user.id)
+        data_manager.remove_xp(user.id, amount)
+        updated_data = data_manager.get_user(user.id)
         
-        await interaction.response.send_message(
+        await respond(
+            interaction,
             f'✅ Removed {amount} XP from {user.mention}. Current XP: {updated_data["xp"]}'
         )
 
     @app_commands.command(name='resetmonth', description='Manually reset the monthly leaderboard (Admin only)')
     async def reset_month(self, interaction: discord.Interaction):
-        if not interaction.user.guild_permissions.administrator:
-            await interaction.response.send_message('❌ You must be an administrator to use this command.', ephemeral=True)
+        if not self.authorizer.has(interaction.user, ADMIN):
+            await respond(interaction, '❌ You must be an administrator to use this command.', ephemeral=True)
             return
         
-        month_key = self.data_manager.get_month_key()
-        self.data_manager.reset_monthly_leaderboard()
+        # Same labelling as the scheduled reset: the month the XP was earned in
+        key = month_key(datetime.now(timezone.utc), self.guild_settings.get(interaction.guild_id, 'timezone'))
+        data_manager = self.guild_data.for_guild(interaction.guild_id)
+        data_manager.reset_monthly_leaderboard(key)
+        
+        await respond(
+            interaction,
+            f'✅ Monthly leaderboard reset! Data saved to Hall of Fame for {key}'
+        )
+
+    @app_commands.command(name='synccommands', description='Force a slash command sync with Discord (Admin only)', extras={'ephemeral': True})
+    async def sync_commands(self, interaction: discord.Interaction):
+        if not self.authorizer.has(interaction.user, ADMIN):
+            await respond(interaction, '❌ You must be an administrator to use this command.', ephemeral=True)
+            return
         
-        await interaction.response.send_message(
-            f'✅ Monthly leaderboard reset! Data saved to Hall of Fame for {month_key}'
+        await defer(interaction, ephemeral=True)
+        synced = await sync_command_tree(self.bot.tree, self.bot.command_tree_state, force=True)
+        await respond(interaction, f'✅ Synced {synced} slash command(s)', ephemeral=True)
+
+    @app_commands.command(name='botstats', description='Show command latency, persistence and event loop stats (Admin only)', extras={'ephemeral': True})
+    async def botstats(self, interaction: discord.Interaction):
+        if not self.authorizer.has(interaction.user, ADMIN):
+            await respond(interaction, '❌ You must be an administrator to use this command.', ephemeral=True)
+            return
+        
+        challenges = self.bot.get_cog('Challenges')
+        embed = create_botstats_embed(
+            registry,
+            time.monotonic() - STARTED,
+            len(self.guild_data.loaded()),
+            challenges.pipeline.stats() if challenges else None,
+            self.bot.broadcaster.stats(),
+            interaction.guild_id
+        )
+        await respond(interaction, embed=embed, ephemeral=True)
+
+    @app_commands.command(name='profile', description='Record a CPU profile of the bot as a flamegraph input (Admin only)', extras={'ephemeral': True})
+    @app_commands.describe(seconds='How long to sample the event loop')
+    async def profile(self, interaction: discord.Interaction, seconds: app_commands.Range[int, 1, PROFILE_MAX_SECONDS] = 10):
+        if not self.authorizer.has(interaction.user, ADMIN):
+            await respond(interaction, '❌ You must be an administrator to use this command.', ephemeral=True)
+            return
+
+        if self.bot.profiler.running:
+            await respond(interaction, '❌ A profile is already being recorded!', ephemeral=True)
+            return
+
+        await defer(interaction, ephemeral=True)
+        path, counts = await self.bot.profiler.profile(seconds)
+
+        # Self time: samples whose innermost frame is this function
+        leaves = Counter()
+        for stack, count in counts.items():
+            leaves[stack.rsplit(';', 1)[-1]] += count
+        total = sum(counts.values())
+        top = '\n'.join(f'`{count / total:6.1%}` {frame}' for frame, count in leaves.most_common(8))
+        await respond(
+            interaction,
+            f'✅ {total} samples over {seconds}s, saved to `{path}`\n{top or "No samples."}',
+            file=discord.File(path),
+            ephemeral=True
         )
 
-    @tasks.loop(hours=24)
-    async def monthly_reset(self):
-        now = datetime.now()
+    @app_commands.command(name='setschedule', description='Set when the weekly challenge announcement is posted (Admin only)', extras={'ephemeral': True})
+    @app_commands.describe(
+        weekday='Day of the announcement',
+        hour='Hour (0-23)',
+        minute='Minute (0-59)',
+        timezone='IANA timezone, e.g. Africa/Casablanca (also used for the monthly reset)'
+    )
+    @app_commands.choices(weekday=[app_commands.Choice(name=name, value=index) for index, name in enumerate(WEEKDAYS)])
+    async def set_schedule(self, interaction: discord.Interaction, weekday: int, hour: app_commands.Range[int, 0, 23],
+                           minute: app_commands.Range[int, 0, 59] = 0, timezone: str = None):
+        if not self.authorizer.has(interaction.user, ADMIN):
+            await respond(interaction, '❌ You must be an administrator to use this command.', ephemeral=True)
+            return
         
-        if now.day == 1 and now.hour == 0:
-            month_key = self.data_manager.get_month_key()
-            self.data_manager.reset_monthly_leaderboard()
+        if timezone:
+            try:
+                ZoneInfo(timezone)
+            except (ZoneInfoNotFoundError, ValueError):
+                await respond(interaction, f'❌ Unknown timezone `{timezone}`!', ephemeral=True)
+                return
+            self.guild_settings.set(interaction.guild_id, 'timezone', timezone)
+        
+        self.guild_settings.set(interaction.guild_id, 'announce_weekday', weekday)
+        self.guild_settings.set(interaction.guild_id, 'announce_hour', hour)
+        self.guild_settings.set(interaction.guild_id, 'announce_minute', minute)
+        self.bot.dispatch('guild_schedule_update', interaction.guild)
+        
+        tz_name = self.guild_settings.get(interaction.guild_id, 'timezone', 'server time')
+        await respond(
+            interaction,
+            f'✅ Weekly announcement set to {WEEKDAYS[weekday]} at {hour:02d}:{minute:02d} ({tz_name})',
+            ephemeral=True
+        )
+
+    @app_commands.command(name='setchannel', description='Choose the exercise or submission channel (Admin only)', extras={'ephemeral': True})
+    @app_commands.describe(
+        kind='Which channel to configure',
+        channel='Use this channel, whatever its name',
+        name='Or use the channel with this name'
+    )
+    @app_commands.choices(kind=[
+        app_commands.Choice(name='Exercise', value='exercise'),
+        app_commands.Choice(name='Submissions', value='submission')
+    ])
+    async def set_channel(self, interaction: discord.Interaction, kind: str,
+                          channel: discord.TextChannel = None, name: str = None):
+        if not self.authorizer.has(interaction.user, ADMIN):
+            await respond(interaction, '❌ You must be an administrator to use this command.', ephemeral=True)
+            return
+        
+        if (channel is None) == (name is None):
+            await respond(interaction, '❌ Give either a channel or a channel name.', ephemeral=True)
+            return
+        
+        self.guild_settings.set(interaction.guild_id, f'{kind}_channel_id', channel.id if channel else None)
+        self.guild_settings.set(interaction.guild_id, f'{kind}_channel_name', name or channel.name)
+        self.channel_index.index_guild(interaction.guild)
+        
+        indexed = self.channel_index.get(interaction.guild, kind)
+        if indexed:
+            await respond(interaction, f'✅ The {kind} channel is now {indexed.mention}', ephemeral=True)
+        else:
+            await respond(
+                interaction,
+                f'✅ Saved. The {kind} channel will be `{name}` once it exists.', ephemeral=True
+            )
+
+    @app_commands.command(name='trainerroles', description='Choose which roles count as trainers (Admin only)', extras={'ephemeral': True})
+    @app_commands.describe(action='Add or remove a trainer role', role='The role to add or remove')
+    @app_commands.choices(action=[
+        app_commands.Choice(name='Add', value='add'),
+        app_commands.Choice(name='Remove', value='remove')
+    ])
+    async def trainer_roles(self, interaction: discord.Interaction, action: str, role: discord.Role):
+        if not self.authorizer.has(interaction.user, ADMIN):
+            await respond(interaction, '❌ You must be an administrator to use this command.', ephemeral=True)
+            return
+
+        role_ids = set(self.authorizer.trainer_role_ids(interaction.guild))
+        if action == 'add':
+            role_ids.add(role.id)
+        else:
+            role_ids.discard(role.id)
+        self.authorizer.set_trainer_role_ids(interaction.guild, role_ids)
+
+        roles = [interaction.guild.get_role(role_id) for role_id in sorted(role_ids)]
+        mentions = ', '.join(role.mention for role in roles if role) or 'none (administrators only)'
+        await respond(interaction, f'✅ Trainer roles: {mentions}', ephemeral=True)
+
+    def schedule_monthly_reset(self, guild):
+        schedule = MonthlySchedule(
+            MONTHLY_RESET_DAY, MONTHLY_RESET_HOUR,
+            tz_name=self.guild_settings.get(guild.id, 'timezone')
+        )
+
+        async def monthly_reset(due):
+            # The reset is due as a month starts and archives the one that just ended;
+            # the due time, not now, so catch-up runs keep the right month
+            key = month_key(due - timedelta(minutes=1), schedule.tz_name)
+            data_manager = await self.guild_data.load(guild.id, self.bot.workers)
+            data_manager.reset_monthly_leaderboard(key)
             
-            print(f'✅ Monthly reset completed for {month_key}')
+            print(f'✅ Monthly reset completed for {key} in {guild.name}')
+
+        # No misfire grace: a reset missed while offline still has to run
+        self.scheduler.add_job(f'monthly_reset:{guild.id}', schedule, monthly_reset)
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        for guild in self.bot.guilds:
+            self.schedule_monthly_reset(guild)
+
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild):
+        self.schedule_monthly_reset(guild)
+
+    @commands.Cog.listener()
+    async def on_guild_schedule_update(self, guild):
+        self.schedule_monthly_reset(guild)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        self.scheduler.remove_job(f'monthly_reset:{guild.id}')
+        self.authorizer.invalidate_guild(guild.id)
+
+    # Cached permission bits follow role and membership changes
+    @commands.Cog.listener()
+    async def on_member_update(self, before, after):
+        if before.roles != after.roles:
+            self.authorizer.member_updated(after)
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member):
+        self.authorizer.member_updated(member)
+
+    @commands.Cog.listener()
+    async def on_guild_role_create(self, role):
+        self.authorizer.role_added(role)
+
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before, after):
+        self.authorizer.role_updated(before, after)
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role):
+        self.authorizer.role_removed(role)
 
-    @monthly_reset.before_loop
-    async def before_monthly_reset(self):
-        await self.bot.wait_until_ready()
+    @commands.Cog.listener()
+    async def on_guild_update(self, before, after):
+        # Ownership carries administrator rights
+        if before.owner_id != after.owner_id:
+            self.authorizer.invalidate_guild(after.id)
 
 async def setup(bot):
     await bot.add_cog(Admin(bot))
\ No newline at end of file
@@ -1,95 +1,134 @@
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
 from discord import app_commands
 from datetime import datetime, timedelta
-from utils.constants import ALLOWED_ROLES, EXERCISE_CHANNEL_NAME, SUBMISSION_CHANNEL_NAME
-from utils.embeds import create_challenge_embed, create_submission_embed
+from utils.constants import (
+    SUBMISSION_QUEUE_SIZE, SUBMISSION_BATCH_SIZE,
+    USER_CACHE_TTL, USER_FETCH_CONCURRENCY, SUBMISSIONS_PAGE_SIZE,
+    CHALLENGE_ANNOUNCE_WEEKDAY, CHALLENGE_ANNOUNCE_HOUR, CHALLENGE_ANNOUNCE_MINUTE,
+    ANNOUNCE_MISFIRE_GRACE
+)
+from utils.interactions import respond, defer
+from utils.embeds import create_challenge_embed, create_submission_embed, create_submissions_embed
+from utils.permissions import TRAINER
+from utils.pipeline import SubmissionPipeline
+from utils.resolver import UserResolver
+from utils.scheduler import WeeklySchedule
+from utils.views import PaginatorView
+from utils.xp_series import challenge_week_key, current_week_key
 
 class Challenges(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.data_manager = bot.data_manager
-        self.auto_post_challenge.start()
-
-    def cog_unload(self):
-        self.auto_post_challenge.cancel()
-
-    def has_trainer_role(self, interaction: discord.Interaction):
-        return any(role.name.lower() in ALLOWED_ROLES for role in interaction.user.roles)
-
-    @app_commands.command(name='postchallenge', description='Post a new weekly challenge')
+        self.guild_data = bot.guild_data
+        self.pipeline = SubmissionPipeline(SUBMISSION_QUEUE_SIZE, SUBMISSION_BATCH_SIZE)
+        self.channel_index = bot.channel_index
+        self.user_resolver = UserResolver(bot, USER_CACHE_TTL, USER_FETCH_CONCURRENCY)
+        self.guild_settings = bot.guild_settings
+        self.scheduler = bot.scheduler
+        self.broadcaster = bot.broadcaster
+        self.authorizer = bot.authorizer
+
+    async def cog_load(self):
+        self.pipeline.start()
+
+    async def cog_unload(self):
+        for guild in self.bot.guilds:
+            self.scheduler.remove_job(f'announce:{guild.id}', keep_state=True)
+        await self.pipeline.stop()
+
+    @app_commands.command(name='postchallenge', description='Post a new weekly challenge', extras={'ephemeral': True})
     @app_commands.describe(
         title='Challenge title',
         description='Challenge description',
         difficulty='Difficulty level (Easy, Medium, Hard)'
     )
     async def post_challenge(self, interaction: discord.Interaction, title: str, description: str, difficulty: str = "Medium"):
-        if not self.has_trainer_role(interaction):
-            await interaction.response.send_message('❌ Only trainers can post challenges!', ephemeral=True)
+        if not self.authorizer.has(interaction.user, TRAINER):
+            await respond(interaction, '❌ Only trainers can post challenges!', ephemeral=True)
             return
 
         # Get exercise channel
-        exercise_channel = discord.utils.get(interaction.guild.channels, name=EXERCISE_CHANNEL_NAME)
+        exercise_channel = self.channel_index.get(interaction.guild, 'exercise')
         if not exercise_channel:
-            await interaction.response.send_message(
-                f'❌ Please create a channel named `{EXERCISE_CHANNEL_NAME}` first!',
+            await respond(
+                interaction,
+                f'❌ Please create a channel named `{self.channel_index.channel_name(interaction.guild_id, "exercise")}` '
+                'or set one with `/setchannel` first!',
                 ephemeral=True
             )
             return
 
         # Create challenge
-        week_number = datetime.now().isocalendar()[1]
+        year, week_number, _ = datetime.now().isocalendar()
         challenge_data = {
             'title': title,
             'description': description,
             'difficulty': difficulty,
             'week': week_number,
+            'year': year,
             'posted_by': interaction.user.id,
             'posted_at': datetime.now().isoformat(),
-            'status': 'active',
-            'submissions': []
+            'status': 'active'
         }
 
         # Save challenge
-        challenge_id = self.data_manager.create_challenge(challenge_data)
-
-        # Post to channel
-        embed = create_challenge_embed(title, description, difficulty, week_number, interaction.user)
-        message = await exercise_channel.send(
+        data_manager = self.guild_data.for_guild(interaction.guild_id)
+        challenge_id = data_manager.create_challenge(challenge_data)
+
+        # Post to channel; retries can outlast the 3s interaction window
+        await defer(interaction, ephemeral=True)
+        submission_channel = self.channel_index.get(interaction.guild, 'submission')
+        embed = create_challenge_embed(
+            title, description, difficulty, week_number, interaction.user,
+            submission_channel.mention if submission_channel
+            else f'`#{self.channel_index.channel_name(interaction.guild_id, "submission")}`'
+        )
+        result = await self.broadcaster.send(
+            exercise_channel,
             content="@everyone 🚨 **New Coding Challenge Posted!**",
             embed=embed
         )
+        if result['error'] is not None:
+            await respond(
+                interaction,
+                f'❌ Challenge saved, but posting in {exercise_channel.mention} failed: {result["error"]}',
+                ephemeral=True
+            )
+            return
 
         # Update challenge with message ID
-        self.data_manager.update_challenge(challenge_id, {'message_id': message.id, 'channel_id': exercise_channel.id})
+        data_manager.update_challenge(challenge_id, {'message_id': result['message'].id, 'channel_id': exercise_channel.id})
 
-        await interaction.response.send_message(
+        await respond(
+            interaction,
             f'✅ Challenge posted successfully in {exercise_channel.mention}!',
             ephemeral=True
         )
 
     @app_commands.command(name='closechallenge', description='Close the current challenge and prepare for winners')
     async def close_challenge(self, interaction: discord.Interaction):
-        if not self.has_trainer_role(interaction):
-            await interaction.response.send_message('❌ Only trainers can close challenges!', ephemeral=True)
+        if not self.authorizer.has(interaction.user, TRAINER):
+            await respond(interaction, '❌ Only trainers can close challenges!', ephemeral=True)
             return
 
-        active_challenge = self.data_manager.get_active_challenge()
+        data_manager = self.guild_data.for_guild(interaction.guild_id)
+        active_challenge = data_manager.get_active_challenge()
         if not active_challenge:
-            await interaction.response.send_message('❌ No active challenge to close!', ephemeral=True)
+            await respond(interaction, '❌ No active challenge to close!', ephemeral=True)
             return
 
-        self.data_manager.update_challenge(active_challenge['id'], {'status': 'closed'})
+        data_manager.update_challenge(active_challenge['id'], {'status': 'closed'})
 
         embed = discord.Embed(
             title='🏁 Challenge Closed!',
             description=f"**{active_challenge['title']}** is now closed for submissions.\n\nTrainers are reviewing submissions...",
             color=discord.Color.red()
         )
-        embed.add_field(name='Total Submissions', value=str(len(active_challenge.get('submissions', []))), inline=True)
+        embed.add_field(name='Total Submissions', value=str(len(data_manager.get_submissions(active_challenge['id']))), inline=True)
         embed.add_field(name='Week', value=f"Week {active_challenge['week']}", inline=True)
 
-        await interaction.response.send_message(embed=embed)
+        await respond(interaction, embed=embed)
 
     @app_commands.command(name='awardwinners', description='Award XP to the top 3 winners')
     @app_commands.describe(
@@ -98,37 +137,40 @@ class Challenges(commands.Cog):
         third='3rd place winner (optional)'
     )
     async def award_winners(self, interaction: discord.Interaction, first: discord.Member, second: discord.Member = None, third: discord.Member = None):
-        if not self.has_trainer_role(interaction):
-            await interaction.response.send_message('❌ Only trainers can award winners!', ephemeral=True)
+        if not self.authorizer.has(interaction.user, TRAINER):
+            await respond(interaction, '❌ Only trainers can award winners!', ephemeral=True)
             return
 
-        challenge = self.data_manager.get_active_challenge() or self.data_manager.get_latest_challenge()
+        data_manager = self.guild_data.for_guild(interaction.guild_id)
+        challenge = data_manager.get_active_challenge() or data_manager.get_latest_challenge()
         if not challenge:
-            await interaction.response.send_message('❌ No challenge found!', ephemeral=True)
+            await respond(interaction, '❌ No challenge found!', ephemeral=True)
             return
 
-        week_key = f"week_{challenge['week']}"
+        week_key = challenge_week_key(challenge)
         winners = []
 
-        # Award 1st place
-        self.data_manager.ensure_user(first.id, first.name)
-        self.data_manager.add_xp(first.id, 10, week_key)
-        self.data_manager.add_badge(first.id, f"🥇 Winner W{challenge['week']}")
-        winners.append(f"🥇 {first.mention} - **10 XP**")
-
-        # Award 2nd place
-        if second:
-            self.data_manager.ensure_user(second.id, second.name)
-            self.data_manager.add_xp(second.id, 7, week_key)
-            self.data_manager.add_badge(second.id, f"🥈 2nd Place W{challenge['week']}")
-            winners.append(f"🥈 {second.mention} - **7 XP**")
-
-        # Award 3rd place
-        if third:
-            self.data_manager.ensure_user(third.id, third.name)
-            self.data_manager.add_xp(third.id, 5, week_key)
-            self.data_manager.add_badge(third.id, f"🥉 3rd Place W{challenge['week']}")
-            winners.append(f"🥉 {third.mention} - **5 XP**")
+        # Apply every award as one commit so a failure can't leave it half-done
+        with data_manager.transaction():
+            # Award 1st place
+            data_manager.ensure_user(first.id, first.name)
+            data_manager.add_xp(first.id, 10, week_key)
+            data_manager.add_badge(first.id, f"🥇 Winner W{challenge['week']}")
+            winners.append(f"🥇 {first.mention} - **10 XP**")
+
+            # Award 2nd place
+            if second:
+                data_manager.ensure_user(second.id, second.name)
+                data_manager.add_xp(second.id, 7, week_key)
+                data_manager.add_badge(second.id, f"🥈 2nd Place W{challenge['week']}")
+                winners.append(f"🥈 {second.mention} - **7 XP**")
+
+            # Award 3rd place
+            if third:
+                data_manager.ensure_user(third.id, third.name)
+                data_manager.add_xp(third.id, 5, week_key)
+                data_manager.add_badge(third.id, f"🥉 3rd Place W{challenge['week']}")
+                winners.append(f"🥉 {third.mention} - **5 XP**")
 
         embed = discord.Embed(
             title='🎉 Winners Announced!',
@@ -137,99 +179,158 @@ class Challenges(commands.Cog):
         )
         embed.set_footer(text='Congratulations to all winners! 🎊')
 
-        await interaction.response.send_message(embed=embed)
+        await respond(interaction, embed=embed)
 
-    @app_commands.command(name='givepoints', description='Give participation points to a user')
+    @app_commands.command(name='givepoints', description='Give participation points to a user', extras={'ephemeral': True})
     @app_commands.describe(user='User to give points to')
     async def give_points(self, interaction: discord.Interaction, user: discord.Member):
-        if not self.has_trainer_role(interaction):
-            await interaction.response.send_message('❌ Only trainers can give points!', ephemeral=True)
+        if not self.authorizer.has(interaction.user, TRAINER):
+            await respond(interaction, '❌ Only trainers can give points!', ephemeral=True)
             return
 
-        challenge = self.data_manager.get_latest_challenge()
-        week_key = f"week_{challenge['week']}" if challenge else f"week_{datetime.now().isocalendar()[1]}"
+        data_manager = self.guild_data.for_guild(interaction.guild_id)
+        challenge = data_manager.get_latest_challenge()
+        week_key = challenge_week_key(challenge) if challenge else current_week_key()
 
-        self.data_manager.ensure_user(user.id, user.name)
-        self.data_manager.add_xp(user.id, 2, week_key)
+        with data_manager.transaction():
+            data_manager.ensure_user(user.id, user.name)
+            data_manager.add_xp(user.id, 2, week_key)
 
-        await interaction.response.send_message(
+        await respond(
+            interaction,
             f'✅ Gave {user.mention} **2 participation points**!',
             ephemeral=True
         )
 
-    @app_commands.command(name='submissions', description='List all submissions for the current challenge')
+    @app_commands.command(name='submissions', description='List all submissions for the current challenge', extras={'ephemeral': True})
     async def list_submissions(self, interaction: discord.Interaction):
-        if not self.has_trainer_role(interaction):
-            await interaction.response.send_message('❌ Only trainers can view submissions!', ephemeral=True)
+        if not self.authorizer.has(interaction.user, TRAINER):
+            await respond(interaction, '❌ Only trainers can view submissions!', ephemeral=True)
             return
 
-        challenge = self.data_manager.get_active_challenge() or self.data_manager.get_latest_challenge()
+        data_manager = self.guild_data.for_guild(interaction.guild_id)
+        challenge = data_manager.get_active_challenge() or data_manager.get_latest_challenge()
         if not challenge:
-            await interaction.response.send_message('❌ No challenge found!', ephemeral=True)
+            await respond(interaction, '❌ No challenge found!', ephemeral=True)
             return
 
-        submissions = challenge.get('submissions', [])
+        # Copy so the pages stay stable while new submissions arrive
+        submissions = list(data_manager.get_submissions(challenge['id']))
         if not submissions:
-            await interaction.response.send_message('❌ No submissions yet!', ephemeral=True)
+            await respond(interaction, '❌ No submissions yet!', ephemeral=True)
             return
 
-        embed = discord.Embed(
-            title=f'📝 Submissions for: {challenge["title"]}',
-            description=f"Total submissions: **{len(submissions)}**",
-            color=discord.Color.blue()
-        )
+        user_ids = [sub['user_id'] for sub in submissions]
+        names, misses = self.user_resolver.resolve_cached(interaction.guild, user_ids)
+        if misses:
+            # Uncached users need REST calls; acknowledge before making them
+            await defer(interaction, ephemeral=True)
+            names.update(await self.user_resolver.fetch_missing(misses))
+
+        page_count = max(1, -(-len(submissions) // SUBMISSIONS_PAGE_SIZE))
 
-        for idx, sub in enumerate(submissions[:25], 1):
-            user = await self.bot.fetch_user(sub['user_id'])
-            embed.add_field(
-                name=f"{idx}. {user.name}",
-                value=f"[View Submission](https://discord.com/channels/{interaction.guild_id}/{sub['channel_id']}/{sub['message_id']})",
-                inline=False
+        def render_page(page):
+            return create_submissions_embed(
+                challenge, submissions, names, interaction.guild_id, page, SUBMISSIONS_PAGE_SIZE
             )
 
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+        embed = render_page(0)
+        view = PaginatorView(render_page, page_count, interaction.user.id)
+        await respond(interaction, embed=embed, view=view, ephemeral=True)
+
+    async def announce_challenges(self, due, guild_ids):
+        # The scheduler hands over every guild due at this time in one batch
+        channels = []
+        for guild_id in guild_ids:
+            guild = self.bot.get_guild(guild_id)
+            exercise_channel = self.channel_index.get(guild, 'exercise') if guild else None
+            if exercise_channel:
+                channels.append(exercise_channel)
+        if not channels:
+            return
 
-    @tasks.loop(hours=24)
-    async def auto_post_challenge(self):
-        now = datetime.now()
+        week_number = due.astimezone().isocalendar()[1]
         
-        # Check if it's Friday at 8 PM (20:00)
-        if now.weekday() == 4 and now.hour == 20:
-            for guild in self.bot.guilds:
-                exercise_channel = discord.utils.get(guild.channels, name=EXERCISE_CHANNEL_NAME)
-                if exercise_channel:
-                    week_number = now.isocalendar()[1]
-                    
-                    embed = discord.Embed(
-                        title='🚨 Weekly Challenge Time!',
-                        description='A trainer will post this week\'s challenge soon!\n\nStay tuned! 🎯',
-                        color=discord.Color.orange()
-                    )
-                    embed.add_field(name='Week', value=f"Week {week_number}", inline=True)
-                    embed.set_footer(text='Use /postchallenge to create the challenge')
-                    
-                    await exercise_channel.send(content="@everyone", embed=embed)
-
-    @auto_post_challenge.before_loop
-    async def before_auto_post(self):
-        await self.bot.wait_until_ready()
+        embed = discord.Embed(
+            title='🚨 Weekly Challenge Time!',
+            description='A trainer will post this week\'s challenge soon!\n\nStay tuned! 🎯',
+            color=discord.Color.orange()
+        )
+        embed.add_field(name='Week', value=f"Week {week_number}", inline=True)
+        embed.set_footer(text='Use /postchallenge to create the challenge')
+        
+        await self.broadcaster.broadcast(channels, since=due.timestamp(), content="@everyone", embed=embed)
+
+    def schedule_announcement(self, guild):
+        schedule = WeeklySchedule(
+            self.guild_settings.get(guild.id, 'announce_weekday', CHALLENGE_ANNOUNCE_WEEKDAY),
+            self.guild_settings.get(guild.id, 'announce_hour', CHALLENGE_ANNOUNCE_HOUR),
+            self.guild_settings.get(guild.id, 'announce_minute', CHALLENGE_ANNOUNCE_MINUTE),
+            self.guild_settings.get(guild.id, 'timezone')
+        )
+
+        # A stale "challenge time" ping is worse than none
+        self.scheduler.add_job(
+            f'announce:{guild.id}', schedule, self.announce_challenges,
+            misfire_grace=ANNOUNCE_MISFIRE_GRACE, batch='announce', payload=guild.id
+        )
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        for guild in self.bot.guilds:
+            self.channel_index.index_guild(guild)
+            self.schedule_announcement(guild)
+
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild):
+        self.channel_index.index_guild(guild)
+        self.schedule_announcement(guild)
+
+    @commands.Cog.listener()
+    async def on_guild_available(self, guild):
+        # Guilds that were unavailable at ready are indexed once they come back
+        self.channel_index.index_guild(guild)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        self.channel_index.forget_guild(guild.id)
+        self.scheduler.remove_job(f'announce:{guild.id}')
+
+    @commands.Cog.listener()
+    async def on_guild_schedule_update(self, guild):
+        self.schedule_announcement(guild)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_create(self, channel):
+        self.channel_index.channel_added(channel)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_update(self, before, after):
+        if before.name != after.name:
+            self.channel_index.channel_added(after)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        self.channel_index.channel_removed(channel)
 
     @commands.Cog.listener()
     async def on_message(self, message):
+        # Runs for every message the bot sees, so the cheap ID check goes first
+        if not self.channel_index.is_submission_channel(message.channel.id) or message.author.bot:
+            return
+
         # Track submissions in submission channel
-        if message.channel.name == SUBMISSION_CHANNEL_NAME and not message.author.bot:
-            active_challenge = self.data_manager.get_active_challenge()
-            if active_challenge:
-                submission_data = {
-                    'user_id': message.author.id,
-                    'message_id': message.id,
-                    'channel_id': message.channel.id,
-                    'submitted_at': datetime.now().isoformat()
-                }
-                self.data_manager.add_submission(active_challenge['id'], submission_data)
-                
-                # React to confirm
-                await message.add_reaction('✅')
+        data_manager = await self.guild_data.load(message.guild.id, self.bot.workers)
+        active_challenge = data_manager.get_active_challenge()
+        if active_challenge:
+            submission_data = {
+                'user_id': message.author.id,
+                'message_id': message.id,
+                'channel_id': message.channel.id,
+                'submitted_at': datetime.now().isoformat()
+            }
+            # Persisting and the ✅ reaction happen in the pipeline worker
+            await self.pipeline.submit(data_manager, active_challenge['id'], submission_data, message)
 
 async def setup(bot):
     await bot.add_cog(Challenges(bot))
\ No newline at end of file
@@ -1,13 +1,25 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
+from utils.interactions import respond
 
 class Help(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        # Neither embed depends on guild data, so both are built once at load
+        self.help_embed = self.build_help_embed()
+        self.about_embed = self.build_about_embed()
 
     @app_commands.command(name='help', description='Show all available commands and how to use the bot')
     async def help_cmd(self, interaction: discord.Interaction):
+        await respond(interaction, embed=self.help_embed)
+
+    @app_commands.command(name='about', description='Learn about talAIt and the bot')
+    async def about(self, interaction: discord.Interaction):
+        await respond(interaction, embed=self.about_embed)
+
+    @staticmethod
+    def build_help_embed():
         embed = discord.Embed(
             title='📚 talAIt Bot - Command Guide',
             description='Welcome to talAIt! Here are all available commands:',
@@ -45,7 +57,15 @@ class Help(commands.Cog):
         # Admin Commands
         embed.add_field(
             name='⚙️ Admin Commands',
-            value='`/resetmonth` - Manually reset monthly leaderboard',
+            value=(
+                '`/resetmonth` - Manually reset monthly leaderboard\n'
+                '`/setschedule` - Set the weekly announcement time and timezone\n'
+                '`/setchannel` - Choose the exercise or submission channel\n'
+                '`/trainerroles` - Choose which roles count as trainers\n'
+                '`/synccommands` - Force a slash command sync\n'
+                '`/botstats` - Show runtime and performance stats\n'
+                '`/profile` - Record a CPU profile of the bot'
+            ),
             inline=False
         )
         
@@ -74,11 +94,10 @@ class Help(commands.Cog):
         )
         
         embed.set_footer(text='Need more help? Contact a trainer!')
-        
-        await interaction.response.send_message(embed=embed)
+        return embed
 
-    @app_commands.command(name='about', description='Learn about talAIt and the bot')
-    async def about(self, interaction: discord.Interaction):
+    @staticmethod
+    def build_about_embed():
         embed = discord.Embed(
             title='ℹ️ About talAIt Bot',
             description=(
@@ -114,8 +133,7 @@ class Help(commands.Cog):
         )
         
         embed.set_footer(text='Built with ❤️ for the talAIt community')
-        
-        await interaction.response.send_message(embed=embed)
+        return embed
 
 async def setup(bot):
     await bot.add_cog(Help(bot))
\ No newline at end of file
@@ -2,44 +2,58 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 from datetime import datetime
-from collections import defaultdict
-from utils.constants import XP_VALUES
+from utils.constants import XP_VALUES, RENDER_CACHE_SIZE, LEADERBOARD_PAGE_SIZE
+from utils.embeds import create_leaderboard_embed, create_hall_of_fame_embed
+from utils.interactions import respond
+from utils.permissions import TRAINER
+from utils.render_cache import RenderCache
+from utils.views import PaginatorView
+from utils.xp_series import current_week_key, parse_week_key, shift_week_key, week_key
 
 class Leaderboard(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.data_manager = bot.data_manager
+        self.guild_data = bot.guild_data
+        self.authorizer = bot.authorizer
+        self.render_cache = RenderCache(RENDER_CACHE_SIZE)
 
     @app_commands.command(name='addxp', description='Add XP to a user')
     @app_commands.describe(
         user='The user to add XP to',
         position='Position or participation (1st, 2nd, 3rd, participation)',
-        week='Week number (optional, defaults to current week)'
+        week='Week number (optional, defaults to current week)',
+        year='ISO year of that week (optional, defaults to current year)'
     )
-    async def add_xp(self, interaction: discord.Interaction, user: discord.Member, position: str, week: int = None):
-        allowed_roles = ['formateur', 'admin', 'moderator']
-        if not any(role.name.lower() in allowed_roles for role in interaction.user.roles):
-            await interaction.response.send_message('❌ You do not have permission to use this command.', ephemeral=True)
+    async def add_xp(self, interaction: discord.Interaction, user: discord.Member, position: str,
+                     week: int = None, year: int = None):
+        if not self.authorizer.has(interaction.user, TRAINER):
+            await respond(interaction, '❌ You do not have permission to use this command.', ephemeral=True)
             return
         
         position = position.lower()
         if position not in XP_VALUES:
-            await interaction.response.send_message(
+            await respond(
+                interaction,
                 f'❌ Invalid position. Use: 1st, 2nd, 3rd, or participation',
                 ephemeral=True
             )
             return
         
-        if week is None:
-            week = datetime.now().isocalendar()[1]
+        current_year, current_week, _ = datetime.now().isocalendar()
+        week = week or current_week
+        year = year or current_year
+        if parse_week_key(week_key(year, week)) is None:
+            await respond(interaction, f'❌ {year} has no week {week}!', ephemeral=True)
+            return
         
-        week_key = f"week_{week}"
         xp_amount = XP_VALUES[position]
         
-        self.data_manager.ensure_user(user.id, user.name)
-        self.data_manager.add_xp(user.id, xp_amount, week_key)
+        data_manager = self.guild_data.for_guild(interaction.guild_id)
+        with data_manager.transaction():
+            data_manager.ensure_user(user.id, user.name)
+            data_manager.add_xp(user.id, xp_amount, week_key(year, week))
         
-        user_data = self.data_manager.get_user(user.id)
+        user_data = data_manager.get_user(user.id)
         
         embed = discord.Embed(
             title='✅ XP Added!',
@@ -47,88 +61,105 @@ class Leaderboard(commands.Cog):
             color=discord.Color.green()
         )
         embed.add_field(name='Current XP', value=f"{user_data['xp']} XP", inline=True)
-        embed.add_field(name='Week', value=f"Week {week}", inline=True)
+        embed.add_field(name='Week', value=f"Week {week}, {year}", inline=True)
         
-        await interaction.response.send_message(embed=embed)
+        await respond(interaction, embed=embed)
 
-    @app_commands.command(name='leaderboard', description='View the current monthly leaderboard')
-    async def leaderboard_cmd(self, interaction: discord.Interaction):
-        leaderboard = self.data_manager.get_leaderboard()
-        
-        if not leaderboard:
-            await interaction.response.send_message('📊 The leaderboard is empty!')
-            return
-        
-        sorted_users = sorted(leaderboard.items(), key=lambda x: x[1]['xp'], reverse=True)
-        month_key = self.data_manager.get_month_key()
-        
-        embed = discord.Embed(
-            title='🏆 talAIt Monthly Leaderboard',
-            description=f'**{month_key}**',
-            color=discord.Color.gold()
+    async def send_ranking(self, interaction, snapshot, render_rows):
+        page_count = snapshot.page_count(LEADERBOARD_PAGE_SIZE)
+
+        def render_page(page):
+            start = page * LEADERBOARD_PAGE_SIZE
+            return render_rows(snapshot.page(page, LEADERBOARD_PAGE_SIZE), page, page_count, start)
+
+        # Every click is served from the snapshot taken here, never re-sorted
+        view = PaginatorView(
+            render_page, page_count, interaction.user.id,
+            find_page=lambda: snapshot.page_of(interaction.user.id, LEADERBOARD_PAGE_SIZE)
         )
+        await respond(interaction, embed=render_page(0), view=view)
+
+    @app_commands.command(name='leaderboard', description='View the monthly, weekly or custom-range leaderboard')
+    @app_commands.describe(
+        mode='Which ranking to show (defaults to this month)',
+        weeks='How many weeks for "Last N weeks" (defaults to 4)',
+        start='First week for "Custom range", e.g. 2026-W10',
+        end='Last week for "Custom range" (defaults to this week)'
+    )
+    @app_commands.choices(mode=[
+        app_commands.Choice(name='This month', value='month'),
+        app_commands.Choice(name='This week', value='week'),
+        app_commands.Choice(name='Last N weeks', value='last'),
+        app_commands.Choice(name='Custom range', value='range')
+    ])
+    async def leaderboard_cmd(self, interaction: discord.Interaction, mode: str = 'month',
+                              weeks: app_commands.Range[int, 1, 52] = 4, start: str = None, end: str = None):
+        data_manager = self.guild_data.for_guild(interaction.guild_id)
+        
+        if mode == 'month':
+            period = None
+            label = data_manager.get_month_key()
+            title = '🏆 talAIt Monthly Leaderboard'
+            footer = 'Updated monthly'
+        else:
+            this_week = current_week_key()
+            if mode == 'week':
+                period = (this_week, this_week)
+            elif mode == 'last':
+                period = (shift_week_key(this_week, 1 - weeks), this_week)
+            else:
+                end = end or this_week
+                if not start or parse_week_key(start) is None or parse_week_key(end) is None or start > end:
+                    await respond(
+                        interaction,
+                        '❌ Give a valid range of ISO weeks, e.g. `start: 2026-W10 end: 2026-W14`', ephemeral=True
+                    )
+                    return
+                period = (start, end)
+            label = period[0] if period[0] == period[1] else f'{period[0]} → {period[1]}'
+            title = '🏆 talAIt Weekly Leaderboard'
+            footer = 'XP earned in these weeks'
+        
+        # One frozen ranking per data version, shared by every view opened on it
+        snapshot = self.render_cache.get(
+            ('leaderboard', interaction.guild_id, period), data_manager.version,
+            lambda: data_manager.get_period_snapshot(*period) if period else data_manager.get_leaderboard_snapshot()
+        )
+        if not snapshot:
+            await respond(interaction, '📊 The leaderboard is empty!')
+            return
         
-        medals = ['🥇', '🥈', '🥉']
-        
-        for idx, (user_id, data) in enumerate(sorted_users[:10]):
-            medal = medals[idx] if idx < 3 else f'**{idx + 1}.**'
-            username = data['username']
-            xp = data['xp']
-            embed.add_field(
-                name=f'{medal} {username}',
-                value=f'{xp} XP',
-                inline=False
+        await self.send_ranking(
+            interaction, snapshot,
+            lambda rows, page, page_count, first: create_leaderboard_embed(
+                rows, label, page, page_count, first, title=title, footer=footer
             )
-        
-        embed.set_footer(text='Updated monthly • Top 10 shown')
-        await interaction.response.send_message(embed=embed)
+        )
 
     @app_commands.command(name='halloffame', description='View the all-time Hall of Fame')
     async def hall_of_fame_cmd(self, interaction: discord.Interaction):
-        hall_of_fame = self.data_manager.get_hall_of_fame()
-        
-        if not hall_of_fame:
-            await interaction.response.send_message('🏛️ The Hall of Fame is empty!')
-            return
-        
-        all_users = defaultdict(lambda: {'username': '', 'total_xp': 0})
-        
-        for month, users in hall_of_fame.items():
-            for user_id, data in users.items():
-                all_users[user_id]['username'] = data['username']
-                all_users[user_id]['total_xp'] += data.get('xp', 0)
+        data_manager = self.guild_data.for_guild(interaction.guild_id)
         
-        sorted_users = sorted(all_users.items(), key=lambda x: x[1]['total_xp'], reverse=True)
-        
-        embed = discord.Embed(
-            title='🏛️ Hall of Fame - All Time Champions',
-            description='Top performers across all months',
-            color=discord.Color.purple()
+        snapshot = self.render_cache.get(
+            ('halloffame', interaction.guild_id), data_manager.version,
+            data_manager.get_all_time_snapshot
         )
+        if not snapshot:
+            await respond(interaction, '🏛️ The Hall of Fame is empty!')
+            return
         
-        medals = ['🥇', '🥈', '🥉']
-        
-        for idx, (user_id, data) in enumerate(sorted_users[:10]):
-            medal = medals[idx] if idx < 3 else f'**{idx + 1}.**'
-            username = data['username']
-            xp = data['total_xp']
-            embed.add_field(
-                name=f'{medal} {username}',
-                value=f'{xp} Total XP',
-                inline=False
-            )
-        
-        embed.set_footer(text='All-time rankings • Top 10 shown')
-        await interaction.response.send_message(embed=embed)
+        await self.send_ranking(interaction, snapshot, create_hall_of_fame_embed)
 
     @app_commands.command(name='stats', description='View your or another user\'s stats')
     @app_commands.describe(user='User to check stats for (optional)')
     async def stats(self, interaction: discord.Interaction, user: discord.Member = None):
         target_user = user or interaction.user
-        user_data = self.data_manager.get_user(target_user.id)
+        data_manager = self.guild_data.for_guild(interaction.guild_id)
+        user_data = data_manager.get_user(target_user.id)
         
         if not user_data:
-            await interaction.response.send_message(
+            await respond(
+                interaction,
                 f'❌ {target_user.mention} has no stats yet!',
                 ephemeral=True
             )
@@ -142,13 +173,13 @@ class Leaderboard(commands.Cog):
         embed.add_field(name='Current Month XP', value=f'{user_data["xp"]} XP', inline=True)
         embed.add_field(name='Total XP', value=f'{user_data["total_xp"]} XP', inline=True)
         
-        rank = self.data_manager.get_user_rank(target_user.id)
+        rank = data_manager.get_user_rank(target_user.id)
         embed.add_field(name='Current Rank', value=f'#{rank}', inline=True)
         
         if target_user.avatar:
             embed.set_thumbnail(url=target_user.avatar.url)
         
-        await interaction.response.send_message(embed=embed)
+        await respond(interaction, embed=embed)
 
 async def setup(bot):
     await bot.add_cog(Leaderboard(bot))
\ No newline at end of file
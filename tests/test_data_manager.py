@@ -0,0 +1,98 @@
+import pytest
+from utils.data_manager import DataManager
+from utils.storage import create_data_manager
+
+WEEK = '2026-W40'
+
+def submission(message_id, user_id=1):
+    return {'user_id': user_id, 'message_id': message_id, 'channel_id': 3, 'submitted_at': '2026-10-01T12:00:00'}
+
+def reopen(data_manager):
+    data_manager.close()
+    return DataManager(data_manager.data_dir)
+
+def test_journal_replays_over_snapshot(tmp_path):
+    data_manager = DataManager(str(tmp_path))
+    data_manager.ensure_user(1, 'ada')
+    data_manager.add_xp(1, 5, WEEK)
+    # A snapshot written while the journal still holds the records behind it
+    data_manager._write_snapshot(data_manager._snapshot())
+    data_manager.add_xp(1, 3, WEEK)
+    data_manager.add_badge(1, 'first')
+
+    data_manager = reopen(data_manager)
+    user = data_manager.get_user(1)
+    assert (user['xp'], user['total_xp'], user['badges']) == (8, 8, ['first'])
+    assert user['weekly_xp'] == {WEEK: 8}
+    assert data_manager.get_period_snapshot(WEEK, WEEK).rows == (('1', 'ada', 8, 1),)
+
+def test_torn_journal_tail_is_cut_before_appending(tmp_path):
+    data_manager = DataManager(str(tmp_path))
+    data_manager.ensure_user(1, 'ada')
+    data_manager.add_xp(1, 5, WEEK)
+    journal_path = data_manager.journal.path
+    data_manager.close()
+    with open(journal_path, 'ab') as f:
+        f.write(b'{"op":"user","id":"1","da')
+
+    data_manager = DataManager(str(tmp_path))
+    assert data_manager.get_user(1)['xp'] == 5
+    data_manager.add_xp(1, 3, WEEK)
+
+    data_manager = reopen(data_manager)
+    assert data_manager.get_user(1)['xp'] == 8
+
+def test_torn_submission_log_tail_is_cut_before_appending(tmp_path):
+    data_manager = DataManager(str(tmp_path))
+    challenge_id = data_manager.create_challenge({'title': 'FizzBuzz', 'status': 'active'})
+    data_manager.add_submission(challenge_id, submission(1))
+    log_path = data_manager.submissions._path(challenge_id)
+    data_manager.close()
+    with open(log_path, 'ab') as f:
+        f.write(b'{"user_id":1,"mess')
+
+    data_manager = DataManager(str(tmp_path))
+    data_manager.add_submission(challenge_id, submission(3))
+
+    data_manager = reopen(data_manager)
+    assert [sub['message_id'] for sub in data_manager.get_submissions(challenge_id)] == [1, 3]
+
+def test_transaction_rollback_restores_indexes(tmp_path):
+    data_manager = DataManager(str(tmp_path))
+    data_manager.ensure_user(1, 'ada')
+    data_manager.ensure_user(2, 'bob')
+    data_manager.add_xp(1, 10, WEEK)
+    data_manager.add_xp(2, 5, WEEK)
+
+    with pytest.raises(RuntimeError):
+        with data_manager.transaction():
+            data_manager.ensure_user(3, 'cyd')
+            data_manager.add_xp(2, 20, WEEK)
+            data_manager.add_xp(3, 1, WEEK)
+            raise RuntimeError('boom')
+
+    for manager in (data_manager, reopen(data_manager)):
+        assert manager.get_user(2)['xp'] == 5
+        assert manager.get_user(3) is None
+        assert (manager.get_user_rank(1), manager.get_user_rank(2)) == (1, 2)
+        assert [user_id for user_id, _ in manager.get_top_users()] == ['1', '2']
+        assert manager.get_period_snapshot(WEEK, WEEK).rows == (('1', 'ada', 10, 0), ('2', 'bob', 5, 0))
+
+@pytest.mark.parametrize('backend', ['json', 'sqlite'])
+def test_resetting_a_month_twice_keeps_its_archive(tmp_path, backend):
+    data_manager = create_data_manager(backend, str(tmp_path))
+    data_manager.ensure_user(1, 'ada')
+    data_manager.add_xp(1, 5, WEEK)
+    data_manager.reset_monthly_leaderboard('2026-10')
+    # e.g. /resetmonth, then the scheduled reset for the same month
+    data_manager.reset_monthly_leaderboard('2026-10')
+    data_manager.add_xp(1, 3, WEEK)
+    data_manager.reset_monthly_leaderboard('2026-10')
+    data_manager.close()
+
+    data_manager = create_data_manager(backend, str(tmp_path))
+    assert data_manager.get_user(1)['xp'] == 0
+    assert data_manager.get_archived_months() == ['2026-10']
+    assert data_manager.get_month_archive('2026-10') == {'1': {'username': 'ada', 'xp': 8}}
+    assert data_manager.get_all_time_top() == [('1', {'username': 'ada', 'total_xp': 8})]
+    data_manager.close()
@@ -0,0 +1,18 @@
+import asyncio
+import importlib
+import sys
+
+def test_all_extensions_load(tmp_path, monkeypatch):
+    # The bot keeps its data under a relative DATA_DIR; keep it out of the tree
+    monkeypatch.chdir(tmp_path)
+    sys.modules.pop('bot', None)
+    bot_module = importlib.import_module('bot')
+
+    async def load():
+        async with bot_module.bot:
+            await bot_module.load_cogs()
+            return set(bot_module.bot.extensions), set(bot_module.bot.cogs)
+
+    extensions, cogs = asyncio.run(load())
+    assert extensions == set(bot_module.EXTENSIONS)
+    assert cogs == {'Challenges', 'Leaderboard', 'Admin', 'Help'}
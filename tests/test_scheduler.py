@@ -0,0 +1,38 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+from utils.scheduler import MonthlySchedule, Scheduler
+
+def test_missed_runs_catch_up_once_after_restart(tmp_path):
+    state_path = str(tmp_path / 'scheduler.json')
+    schedule = MonthlySchedule(1, 0, tz_name='UTC')
+    missed = datetime.now(timezone.utc) - timedelta(hours=2)
+    with open(state_path, 'w') as f:
+        json.dump({
+            'reset': {'schedule': schedule.key(), 'next_run': missed.timestamp()},
+            'announce': {'schedule': schedule.key(), 'next_run': missed.timestamp()},
+        }, f)
+
+    async def run():
+        scheduler = Scheduler(state_path)
+        fired = []
+
+        async def reset(due):
+            fired.append(('reset', due))
+
+        async def announce(due):
+            fired.append(('announce', due))
+
+        scheduler.add_job('reset', schedule, reset)
+        scheduler.add_job('announce', schedule, announce, misfire_grace=60)
+        scheduler.start()
+        await asyncio.sleep(0.1)
+        scheduler.stop()
+        return fired, scheduler.next_run('reset')
+
+    fired, next_run = asyncio.run(run())
+    # Without a grace the missed run fires, with its original due time; a stale one is skipped
+    assert [(name, round(due.timestamp())) for name, due in fired] == [('reset', round(missed.timestamp()))]
+    assert next_run == schedule.next_after(datetime.now(timezone.utc))
+    with open(state_path) as f:
+        assert json.load(f)['reset']['next_run'] == next_run.timestamp()
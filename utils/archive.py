@@ -0,0 +1,106 @@
+import os
+from collections import OrderedDict
+from utils import formats
+
+class MonthArchive:
+    """Hall of Fame archive with one file per month.
+
+    A month is never overwritten with less: archiving it again merges the new
+    XP into it (see `merge`). Only `username` and `xp` are kept per user. Months are read from disk on
+    demand and held in a small LRU cache; freshly archived months wait in
+    memory until the next flush writes them out. Files keep their `.json`
+    name whatever `storage_format` they are written in; reads detect it.
+    """
+
+    def __init__(self, directory, cache_size, storage_format='json-compact'):
+        self.directory = directory
+        self.cache_size = cache_size
+        self.storage_format = storage_format
+        self._cache = OrderedDict()
+        self._pending = {}
+        self._writing = {}
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def compact(users):
+        return {
+            user_id: {'username': data['username'], 'xp': data.get('xp', 0)}
+            for user_id, data in users.items()
+        }
+
+    @staticmethod
+    def merge(archived, users):
+        merged = {user_id: dict(data) for user_id, data in archived.items()}
+        for user_id, data in users.items():
+            entry = merged.setdefault(user_id, {'username': data['username'], 'xp': 0})
+            entry['username'] = data['username']
+            entry['xp'] += data['xp']
+        return merged
+
+    def _path(self, month_key):
+        return os.path.join(self.directory, f'{month_key}.json')
+
+    def months(self):
+        return sorted(set(self._pending) | set(self._writing) | {
+            name[:-len('.json')] for name in os.listdir(self.directory) if name.endswith('.json')
+        })
+
+    def get(self, month_key):
+        if month_key in self._pending:
+            return self._pending[month_key]
+        if month_key in self._writing:
+            return self._writing[month_key]
+        if month_key in self._cache:
+            self._cache.move_to_end(month_key)
+            return self._cache[month_key]
+
+        path = self._path(month_key)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            users = formats.loads(f.read())
+        self._cache[month_key] = users
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return users
+
+    def pending(self, month_key):
+        return self._pending.get(month_key)
+
+    def put(self, month_key, users):
+        self._cache.pop(month_key, None)
+        self._pending[month_key] = users
+
+    def discard(self, month_key):
+        self._cache.pop(month_key, None)
+        self._pending.pop(month_key, None)
+
+    def take_pending(self):
+        pending, self._pending = self._pending, {}
+        self._writing.update(pending)
+        return pending
+
+    def write(self, archives):
+        for month_key, users in archives.items():
+            path = self._path(month_key)
+            tmp_path = f'{path}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(formats.dumps(users, self.storage_format))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+            if self._writing.get(month_key) is users:
+                del self._writing[month_key]
+
+    def migrate(self, legacy_path):
+        """Split a legacy all-months hall_of_fame.json into per-month files."""
+        if not os.path.exists(legacy_path):
+            return
+        with open(legacy_path, 'rb') as f:
+            hall_of_fame = formats.loads(f.read())
+        self.write({
+            month_key: self.compact(users)
+            for month_key, users in hall_of_fame.items()
+            if not os.path.exists(self._path(month_key))
+        })
+        os.replace(legacy_path, f'{legacy_path}.migrated')
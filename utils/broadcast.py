@@ -0,0 +1,98 @@
+import asyncio
+import time
+import discord
+
+class Broadcaster:
+    """Sends messages to many channels at once under one global send budget.
+
+    Every send, whichever cog or job it comes from, waits for a slot from a
+    shared pacing clock (`rate` sends per second) and a concurrency limit, so
+    a fan-out to hundreds of guilds can't trip Discord's global rate limit.
+    Transient failures are retried with exponential backoff; delivery latency
+    and failures are tracked per guild.
+    """
+
+    def __init__(self, concurrency, rate, retries, backoff):
+        self.rate = rate
+        self.retries = retries
+        self.backoff = backoff
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._next_slot = 0.0
+        self._guild_stats = {}
+
+    async def _wait_for_slot(self):
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + 1 / self.rate
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    @staticmethod
+    def _retryable(error):
+        # Missing access or a deleted channel won't fix itself
+        if isinstance(error, (discord.Forbidden, discord.NotFound)):
+            return False
+        if isinstance(error, discord.HTTPException):
+            return error.status == 429 or error.status >= 500
+        return isinstance(error, (asyncio.TimeoutError, OSError))
+
+    def _track(self, result):
+        stats = self._guild_stats.setdefault(result['guild_id'], {
+            'delivered': 0, 'failed': 0, 'retries': 0, 'last_latency': None, 'max_latency': 0.0
+        })
+        stats['retries'] += result['attempts'] - 1
+        if result['error'] is None:
+            stats['delivered'] += 1
+            stats['last_latency'] = result['latency']
+            stats['max_latency'] = max(stats['max_latency'], result['latency'])
+        else:
+            stats['failed'] += 1
+
+    async def send(self, channel, since=None, **kwargs):
+        """Send one message through the shared budget; never raises HTTP errors."""
+        since = time.time() if since is None else since
+        result = {
+            'guild_id': channel.guild.id,
+            'channel_id': channel.id,
+            'message': None,
+            'attempts': 0,
+            'latency': None,
+            'error': None,
+        }
+
+        async with self._semaphore:
+            while True:
+                result['attempts'] += 1
+                await self._wait_for_slot()
+                try:
+                    result['message'] = await channel.send(**kwargs)
+                    result['error'] = None
+                    break
+                except Exception as e:
+                    result['error'] = e
+                    if result['attempts'] > self.retries or not self._retryable(e):
+                        break
+                await asyncio.sleep(self.backoff * 2 ** (result['attempts'] - 1))
+
+        result['latency'] = time.time() - since
+        self._track(result)
+        return result
+
+    async def broadcast(self, channels, since=None, **kwargs):
+        """Send the same message to every channel concurrently and log a summary."""
+        since = time.time() if since is None else since
+        results = await asyncio.gather(*(self.send(channel, since, **kwargs) for channel in channels))
+
+        delivered = [result for result in results if result['error'] is None]
+        if delivered:
+            slowest = max(result['latency'] for result in delivered)
+            print(f'📣 Broadcast delivered to {len(delivered)}/{len(results)} channel(s), slowest {slowest:.2f}s')
+        for result in results:
+            if result['error'] is not None:
+                print(f"❌ Broadcast to guild {result['guild_id']} failed after "
+                      f"{result['attempts']} attempt(s): {result['error']}")
+        return results
+
+    def stats(self):
+        return {guild_id: dict(stats) for guild_id, stats in self._guild_stats.items()}
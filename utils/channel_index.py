@@ -0,0 +1,100 @@
+import discord
+from utils.constants import EXERCISE_CHANNEL_NAME, SUBMISSION_CHANNEL_NAME
+
+CHANNEL_KINDS = {
+    'exercise': EXERCISE_CHANNEL_NAME,
+    'submission': SUBMISSION_CHANNEL_NAME,
+}
+
+class ChannelIndex:
+    """Per-guild map of the exercise and submission channel IDs.
+
+    A guild can pin a channel by ID or change the name to look for through
+    its settings (`<kind>_channel_id` / `<kind>_channel_name`); otherwise the
+    default names are used. Names are only matched to fill an empty slot, and
+    the ID of a channel found by name is saved to the settings, so once a
+    channel is indexed it is tracked by ID, across restarts too, and renaming
+    it doesn't stop submissions from being recorded. Deleting it frees the
+    slot for name matching again.
+    """
+
+    def __init__(self, guild_settings):
+        self.guild_settings = guild_settings
+        self._channels = {}
+        self._submission_ids = set()
+
+    def channel_name(self, guild_id, kind):
+        return self.guild_settings.get(guild_id, f'{kind}_channel_name', CHANNEL_KINDS[kind])
+
+    def _set(self, guild_id, kind, channel_id):
+        slots = self._channels.setdefault(guild_id, {})
+        if kind == 'submission':
+            self._submission_ids.discard(slots.get(kind))
+            if channel_id is not None:
+                self._submission_ids.add(channel_id)
+        if channel_id is None:
+            slots.pop(kind, None)
+        else:
+            slots[kind] = channel_id
+
+    def _remember(self, guild_id, kind, channel_id):
+        if self.guild_settings.get(guild_id, f'{kind}_channel_id') != channel_id:
+            self.guild_settings.set(guild_id, f'{kind}_channel_id', channel_id)
+
+    def _resolve(self, guild, kind):
+        channel_id = self.guild_settings.get(guild.id, f'{kind}_channel_id')
+        if channel_id is not None:
+            if guild.get_channel(channel_id):
+                return channel_id
+            # Deleted while we were offline
+            self._remember(guild.id, kind, None)
+        name = self.channel_name(guild.id, kind)
+        for channel in guild.text_channels:
+            if channel.name == name:
+                self._remember(guild.id, kind, channel.id)
+                return channel.id
+        return None
+
+    def _matches(self, channel, kind):
+        channel_id = self.guild_settings.get(channel.guild.id, f'{kind}_channel_id')
+        if channel_id is not None:
+            return channel.id == channel_id
+        return channel.name == self.channel_name(channel.guild.id, kind)
+
+    def index_guild(self, guild):
+        # An outage hides the channels; resolving now would drop the saved IDs
+        if guild.unavailable:
+            return
+        for kind in CHANNEL_KINDS:
+            self._set(guild.id, kind, self._resolve(guild, kind))
+
+    def forget_guild(self, guild_id):
+        for kind in CHANNEL_KINDS:
+            self._set(guild_id, kind, None)
+        self._channels.pop(guild_id, None)
+
+    def channel_added(self, channel):
+        # Covers both new channels and renames into a configured name
+        if not isinstance(channel, discord.TextChannel):
+            return
+        slots = self._channels.setdefault(channel.guild.id, {})
+        for kind in CHANNEL_KINDS:
+            if kind not in slots and self._matches(channel, kind):
+                self._remember(channel.guild.id, kind, channel.id)
+                self._set(channel.guild.id, kind, channel.id)
+
+    def channel_removed(self, channel):
+        slots = self._channels.get(channel.guild.id, {})
+        for kind in CHANNEL_KINDS:
+            if slots.get(kind) == channel.id:
+                self._set(channel.guild.id, kind, None)
+                self._remember(channel.guild.id, kind, None)
+                # Another channel may carry the configured name
+                self._set(channel.guild.id, kind, self._resolve(channel.guild, kind))
+
+    def get(self, guild, kind):
+        channel_id = self._channels.get(guild.id, {}).get(kind)
+        return guild.get_channel(channel_id) if channel_id else None
+
+    def is_submission_channel(self, channel_id):
+        return channel_id in self._submission_ids
@@ -0,0 +1,32 @@
+import hashlib
+import json
+import os
+
+def command_tree_fingerprint(tree):
+    payloads = []
+    for command in tree.get_commands():
+        try:
+            payloads.append(command.to_dict(tree))
+        except TypeError:
+            # discord.py < 2.4 takes no tree argument
+            payloads.append(command.to_dict())
+    payloads.sort(key=lambda payload: payload['name'])
+    return hashlib.sha256(json.dumps(payloads, sort_keys=True).encode()).hexdigest()
+
+async def sync_command_tree(tree, state_path, force=False):
+    """Sync slash commands only when their definitions changed.
+
+    Returns the number of synced commands, or None when the stored
+    fingerprint already matched and the sync was skipped.
+    """
+    fingerprint = command_tree_fingerprint(tree)
+    if not force and os.path.exists(state_path):
+        with open(state_path, 'r') as f:
+            if f.read().strip() == fingerprint:
+                return None
+
+    synced = await tree.sync()
+    os.makedirs(os.path.dirname(state_path) or '.', exist_ok=True)
+    with open(state_path, 'w') as f:
+        f.write(fingerprint)
+    return len(synced)
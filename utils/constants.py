@@ -7,14 +7,72 @@ XP_VALUES = {
 }
 
 # Data files
+STORAGE_BACKEND = 'json'  # 'json' or 'sqlite'; overridable with the STORAGE_BACKEND env var
+STORAGE_FORMAT = 'json'  # json backend files: 'json', 'json-compact' or 'msgpack'; env STORAGE_FORMAT
 DATA_DIR = 'data'
+SQLITE_FILE = 'talait.db'
+COMMAND_TREE_STATE_FILE = 'command_tree.sha256'
+SCHEDULER_STATE_FILE = 'scheduler.json'
+METRICS_FILE = 'metrics.prom'  # Prometheus text format, for node_exporter's textfile collector
+GUILD_SETTINGS_FILE = 'guild_settings.json'
+PROFILES_DIR = 'profiles'  # collapsed-stack output of /profile
+GUILDS_DIR = 'guilds'  # per-guild shards live in DATA_DIR/GUILDS_DIR/<guild_id>
+LEGACY_GUILD_FILE = 'legacy_guild.json'  # guild that owns the pre-sharding top-level data
 LEADERBOARD_FILE = 'leaderboard.json'
-HALL_OF_FAME_FILE = 'hall_of_fame.json'
+HALL_OF_FAME_FILE = 'hall_of_fame.json'  # legacy, split into HALL_OF_FAME_DIR on startup
+HALL_OF_FAME_DIR = 'hall_of_fame'
+ARCHIVE_CACHE_SIZE = 6  # archived months kept in memory
+SUBMISSIONS_DIR = 'submissions'
+SUBMISSIONS_CACHE_SIZE = 4  # challenges whose submissions are kept in memory
 CHALLENGES_FILE = 'challenges.json'
+ALL_TIME_FILE = 'all_time.json'
+JOURNAL_FILE = 'journal.log'
+JOURNAL_COMPACT_THRESHOLD = 1024 * 1024  # bytes
+FLUSH_DELAY = 0.5  # seconds mutations are coalesced before hitting disk
 
 # Role permissions
-ALLOWED_ROLES = ['formateur', 'admin', 'moderator']
+TRAINER_ROLE_NAMES = ['formateur', 'admin', 'moderator']  # seeds a guild's trainer_role_ids once
 
 # Channel names
 EXERCISE_CHANNEL_NAME = 'exercice'
-SUBMISSION_CHANNEL_NAME = 'code-wars-submissions'
\ No newline at end of file
+SUBMISSION_CHANNEL_NAME = 'code-wars-submissions'
+
+# Submission ingestion
+SUBMISSION_QUEUE_SIZE = 1000
+SUBMISSION_BATCH_SIZE = 50
+
+# Submission listing
+SUBMISSIONS_PAGE_SIZE = 10
+USER_CACHE_TTL = 600  # seconds
+USER_FETCH_CONCURRENCY = 5
+
+# Leaderboard / Hall of Fame views
+RENDER_CACHE_SIZE = 256  # ranking snapshots kept across requests
+LEADERBOARD_PAGE_SIZE = 10
+
+# Scheduled jobs (defaults; overridable per guild with /setschedule)
+CHALLENGE_ANNOUNCE_WEEKDAY = 4  # Friday
+CHALLENGE_ANNOUNCE_HOUR = 20
+CHALLENGE_ANNOUNCE_MINUTE = 0
+MONTHLY_RESET_DAY = 1
+MONTHLY_RESET_HOUR = 0
+ANNOUNCE_MISFIRE_GRACE = 6 * 3600  # seconds; older missed announcements are skipped
+
+# Announcement fan-out (shared by every cog)
+BROADCAST_CONCURRENCY = 10
+BROADCAST_RATE = 20  # sends per second, well under Discord's global limit
+BROADCAST_RETRIES = 3
+BROADCAST_BACKOFF = 1.0  # seconds, doubled on every retry
+
+# Runtime metrics
+METRICS_SAMPLE_INTERVAL = 1.0  # seconds between event-loop lag samples
+METRICS_WRITE_EVERY = 15  # samples between writes of METRICS_FILE
+
+# Profiling
+PROFILE_SAMPLE_INTERVAL = 0.005  # seconds between stack samples (~200 Hz)
+PROFILE_MAX_SECONDS = 120
+SLOW_CALLBACK_THRESHOLD = 0.25  # seconds the loop may stay blocked before its stack is logged
+
+# Slash command middleware
+AUTO_DEFER_AFTER = 2.0  # seconds; Discord fails interactions not acknowledged within 3
+COMMAND_WORKERS = 4  # threads that open guild shards off the event loop
@@ -1,74 +1,376 @@
-import json
+import asyncio
 import os
-from datetime import datetime
-from utils.constants import DATA_DIR, LEADERBOARD_FILE, HALL_OF_FAME_FILE, CHALLENGES_FILE
+import sys
+from contextlib import contextmanager
+from utils.constants import (
+    DATA_DIR, LEADERBOARD_FILE, HALL_OF_FAME_FILE, HALL_OF_FAME_DIR, CHALLENGES_FILE, ALL_TIME_FILE,
+    JOURNAL_FILE, JOURNAL_COMPACT_THRESHOLD, FLUSH_DELAY, ARCHIVE_CACHE_SIZE,
+    SUBMISSIONS_DIR, SUBMISSIONS_CACHE_SIZE, STORAGE_FORMAT
+)
+from utils import formats
+from utils.archive import MonthArchive
+from utils.journal import Journal
+from utils.metrics import registry, timed, SIZE_BUCKETS
+from utils.ranking import RankIndex, RankSnapshot
+from utils.records import UserRecord
+from utils.xp_series import XPSeries
+from utils.storage import Storage
+from utils.submissions import SubmissionStore
 
-class DataManager:
+def _clone(value):
+    if isinstance(value, dict):
+        return {k: _clone(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_clone(v) for v in value]
+    return value
+
+class _Transaction:
     def __init__(self):
-        self.data_dir = DATA_DIR
+        self.depth = 0
+        self.records = {}
+        self.undo = []
+        self.touched = set()
+        self.submissions = []
+
+class DataManager(Storage):
+    def __init__(self, data_dir=DATA_DIR, storage_format=STORAGE_FORMAT):
+        formats.check_format(storage_format)
+        self.data_dir = data_dir
+        self.storage_format = storage_format
         self.leaderboard_file = LEADERBOARD_FILE
         self.hall_of_fame_file = HALL_OF_FAME_FILE
         self.challenges_file = CHALLENGES_FILE
-        
+        self.all_time_file = ALL_TIME_FILE
+
         os.makedirs(self.data_dir, exist_ok=True)
-        
-        self.leaderboard = self._load_data(self.leaderboard_file)
-        self.hall_of_fame = self._load_data(self.hall_of_fame_file)
+
+        # Month files were always compact, so the pretty layout doesn't apply to them
+        archive_format = 'json-compact' if storage_format == 'json' else storage_format
+        self.archive = MonthArchive(os.path.join(self.data_dir, HALL_OF_FAME_DIR), ARCHIVE_CACHE_SIZE, archive_format)
+        self.archive.migrate(os.path.join(self.data_dir, self.hall_of_fame_file))
+
+        self.submissions = SubmissionStore(os.path.join(self.data_dir, SUBMISSIONS_DIR), SUBMISSIONS_CACHE_SIZE)
+
+        self.leaderboard = {
+            user_id: UserRecord.from_dict(data)
+            for user_id, data in self._load_data(self.leaderboard_file).items()
+        }
         self.challenges = self._load_data(self.challenges_file)
+        if self.submissions.migrate(self.challenges):
+            self._save_data(self.challenges_file, self.challenges)
+        self.all_time = self._load_all_time()
+
+        self.journal = Journal(os.path.join(self.data_dir, JOURNAL_FILE), JOURNAL_COMPACT_THRESHOLD)
+        self._flush_handle = None
+        self._flush_lock = asyncio.Lock()
+        self._txn = None
+        self.version = 0
+        self._replay_journal()
+
+        self._challenge_index = {challenge['id']: challenge for challenge in self.challenges}
+        self._active_challenge = None
+        self._refresh_active_challenge()
+
+        self.rank_index = RankIndex((uid, record.xp) for uid, record in self.leaderboard.items())
+        self.all_time_index = RankIndex(
+            (uid, data['total_xp']) for uid, data in self.all_time['users'].items()
+        )
+
+        self.xp_series = XPSeries()
+        for uid, record in self.leaderboard.items():
+            for week_key, amount in record.iso_weeks():
+                self.xp_series.add(uid, week_key, amount)
 
     def _load_data(self, filename):
         filepath = os.path.join(self.data_dir, filename)
-        if os.path.exists(filepath):
-            with open(filepath, 'r') as f:
-                return json.load(f)
-        return {} if filename != self.challenges_file else []
+        if not os.path.exists(filepath):
+            return {} if filename != self.challenges_file else []
+        with open(filepath, 'rb') as f:
+            raw = f.read()
+        data = formats.loads(raw)
+        # Files in another format (e.g. the original pretty JSON) are rewritten once
+        if not formats.matches(raw, self.storage_format):
+            self._save_data(filename, data)
+        return data
+
+    def _load_all_time(self):
+        if os.path.exists(os.path.join(self.data_dir, self.all_time_file)):
+            return self._load_data(self.all_time_file)
+
+        # Older data directories only have the monthly archives; fold them once
+        # and save the result, so later starts don't read every month again
+        all_time = {'months': [], 'users': {}}
+        for month_key in self.archive.months():
+            self._fold_month(all_time, month_key, self.archive.get(month_key))
+        self._save_data(self.all_time_file, all_time)
+        return all_time
 
     def _save_data(self, filename, data):
         filepath = os.path.join(self.data_dir, filename)
-        with open(filepath, 'w') as f:
-            json.dump(data, f, indent=4)
+        tmp_path = f'{filepath}.tmp'
+        with timed('storage_save_seconds', file=filename):
+            raw = formats.dumps(data, self.storage_format)
+            with open(tmp_path, 'wb') as f:
+                f.write(raw)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, filepath)
+        registry.observe('storage_save_bytes', len(raw), buckets=SIZE_BUCKETS, file=filename)
+        registry.inc('storage_written_bytes_total', len(raw), kind='snapshot')
+
+    # Journal
+    def _replay_journal(self):
+        handlers = {
+            'user': self._apply_user,
+            'reset': self._apply_reset,
+            'challenge': self._apply_challenge,
+            'submission': self._apply_submission,
+        }
+
+        def apply(record):
+            if record.get('op') == 'batch':
+                for sub_record in record['records']:
+                    apply(sub_record)
+            elif record.get('op') in handlers:
+                handlers[record['op']](record)
+
+        for record in self.journal.read():
+            apply(record)
+
+        # Replayed resets and legacy submission records leave files waiting to be written
+        self.archive.write(self.archive.take_pending())
+        self.submissions.write(self.submissions.take_pending())
+
+        # A compaction was interrupted; fold its records into the snapshot now
+        if self.journal.has_rotated():
+            self._write_snapshot(self._snapshot())
+
+    def _record(self, record, key=None):
+        if self._txn is not None:
+            # Re-recording the same key keeps only the latest state, at its latest position
+            key = key if key is not None else len(self._txn.records)
+            self._txn.records.pop(key, None)
+            self._txn.records[key] = record
+            return
+        self.journal.append(record)
+        self._mark_dirty()
+
+    # Transactions
+    @contextmanager
+    def transaction(self):
+        """Group mutations into one journal record.
+
+        Everything done inside the block is committed as a single line, so a
+        crash can never leave it half-applied, and an exception rolls the
+        in-memory state back.
+        """
+        if self._txn is None:
+            self._txn = _Transaction()
+        txn = self._txn
+        txn.depth += 1
+        try:
+            yield self
+        except BaseException:
+            if txn.depth == 1:
+                self._txn = None
+                for undo in reversed(txn.undo):
+                    undo()
+                self.version += 1
+            raise
+        finally:
+            txn.depth -= 1
+        if txn.depth == 0:
+            self._txn = None
+            if txn.records:
+                self._record({'op': 'batch', 'records': list(txn.records.values())})
+            for challenge_id, submission in txn.submissions:
+                self.submissions.queue(challenge_id, submission)
+            if txn.submissions:
+                self._mark_dirty()
+
+    def _touch(self, key, undo):
+        if self._txn is not None and key not in self._txn.touched:
+            self._txn.touched.add(key)
+            self._txn.undo.append(undo)
+
+    def _touch_user(self, user_id):
+        if self._txn is None or ('user', user_id) in self._txn.touched:
+            return
+        before = self.leaderboard.get(user_id)
+        before = before.copy() if before is not None else None
+
+        def undo():
+            if before is None:
+                self.leaderboard.pop(user_id, None)
+                self.rank_index.remove(user_id)
+            else:
+                self.leaderboard[user_id] = before
+                self.rank_index.update(user_id, before.xp)
+
+        self._touch(('user', user_id), undo)
+
+    # Write-behind persistence
+    def _mark_dirty(self):
+        self.version += 1
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop (scripts, migrations): persist straight away
+            self.flush_sync()
+            return
+        if self._flush_handle is None:
+            self._flush_handle = loop.call_later(FLUSH_DELAY, self._start_flush)
+
+    def _start_flush(self):
+        self._flush_handle = None
+        asyncio.ensure_future(self.flush())
+
+    def _has_pending(self):
+        return self.journal.has_pending() or self.submissions.has_pending()
+
+    def _prepare_flush(self):
+        lines = self.journal.take_pending()
+        archives = self.archive.take_pending()
+        submissions = self.submissions.take_pending()
+        snapshot = self._snapshot() if self.journal.needs_compaction() else None
+        return lines, archives, submissions, snapshot
+
+    def _persist(self, lines, archives, submissions, snapshot):
+        with timed('storage_flush_seconds'):
+            self.journal.write(lines)
+            self.submissions.write(submissions)
+            # Month files must exist before the journal holding their records is discarded
+            self.archive.write(archives)
+            if snapshot is not None:
+                self.journal.rotate()
+                self._write_snapshot(snapshot)
+        registry.inc('storage_flushes_total')
+        registry.inc('storage_written_bytes_total', sum(map(len, lines)), kind='journal')
+        registry.inc('storage_written_bytes_total', sum(len(line) for chunk in submissions.values() for line in chunk),
+                     kind='submissions')
+
+    async def flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        async with self._flush_lock:
+            if not self._has_pending():
+                return
+            await asyncio.get_running_loop().run_in_executor(None, self._persist, *self._prepare_flush())
+
+    def flush_sync(self):
+        self._persist(*self._prepare_flush())
+
+    def close(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._has_pending():
+            self.flush_sync()
+        self.journal.close()
+
+    def _snapshot(self):
+        return {
+            self.leaderboard_file: {user_id: record.to_dict() for user_id, record in self.leaderboard.items()},
+            self.challenges_file: _clone(self.challenges),
+            self.all_time_file: _clone(self.all_time),
+        }
 
-    def get_month_key(self):
-        now = datetime.now()
-        return f"{now.year}-{now.month:02d}"
+    def _write_snapshot(self, snapshot):
+        for filename, data in snapshot.items():
+            self._save_data(filename, data)
+        self.journal.discard_rotated()
+
+    def _apply_user(self, record):
+        self.leaderboard[record['id']] = UserRecord.from_dict(record['data'])
+
+    def _apply_reset(self, record):
+        month_key = record['month']
+        archive = MonthArchive.compact(record['archive'])
+        if month_key in self.all_time['months']:
+            # The record holds the month's whole archive: swap out its old contribution
+            self._fold_month(self.all_time, month_key, self.archive.get(month_key) or {}, sign=-1)
+        self._fold_month(self.all_time, month_key, archive)
+
+        self.archive.put(month_key, archive)
+        for user in self.leaderboard.values():
+            user.xp = 0
+
+    @staticmethod
+    def _fold_month(all_time, month_key, users, sign=1):
+        totals = all_time['users']
+        for user_id, data in users.items():
+            entry = totals.setdefault(user_id, {'username': data['username'], 'total_xp': 0})
+            entry['total_xp'] += sign * data.get('xp', 0)
+            if sign > 0:
+                entry['username'] = data['username']
+        if sign > 0 and month_key not in all_time['months']:
+            all_time['months'].append(month_key)
+
+    def _apply_challenge(self, record):
+        data = {k: v for k, v in record['data'].items() if k != 'submissions'}
+        for challenge in self.challenges:
+            if challenge['id'] == data['id']:
+                challenge.update(data)
+                return
+        self.challenges.append(data)
+
+    def _apply_submission(self, record):
+        # Submissions are no longer journaled; this replays journals from older versions
+        if self.submissions.add(record['challenge_id'], record['data']):
+            self.submissions.queue(record['challenge_id'], record['data'])
+
+    def _refresh_active_challenge(self):
+        self._active_challenge = next(
+            (c for c in reversed(self.challenges) if c.get('status') == 'active'), None
+        )
+
+    def _record_user(self, user_id):
+        # Every user mutation funnels through here, so the rank index stays in step
+        user = self.leaderboard[user_id]
+        self.rank_index.update(user_id, user.xp)
+        self._record({'op': 'user', 'id': user_id, 'data': user.to_dict()}, ('user', user_id))
+
+    def _record_challenge(self, challenge):
+        self._record({'op': 'challenge', 'data': dict(challenge)}, ('challenge', challenge['id']))
 
     def ensure_user(self, user_id, username):
         user_id = str(user_id)
+        self._touch_user(user_id)
         if user_id not in self.leaderboard:
-            self.leaderboard[user_id] = {
-                'username': username,
-                'xp': 0,
-                'weekly_xp': {},
-                'total_xp': 0,
-                'badges': []
-            }
+            self.leaderboard[user_id] = UserRecord(username)
+        elif self.leaderboard[user_id].username == username:
+            return
         else:
-            self.leaderboard[user_id]['username'] = username
-        self._save_data(self.leaderboard_file, self.leaderboard)
+            self.leaderboard[user_id].username = sys.intern(username)
+        self._record_user(user_id)
 
     def add_xp(self, user_id, amount, week_key):
         user_id = str(user_id)
-        self.leaderboard[user_id]['xp'] += amount
-        self.leaderboard[user_id]['total_xp'] += amount
-        
-        if week_key not in self.leaderboard[user_id]['weekly_xp']:
-            self.leaderboard[user_id]['weekly_xp'][week_key] = 0
-        self.leaderboard[user_id]['weekly_xp'][week_key] += amount
-        
-        self._save_data(self.leaderboard_file, self.leaderboard)
+        self._touch_user(user_id)
+        user = self.leaderboard[user_id]
+        user.xp += amount
+        user.total_xp += amount
+        user.add_week_xp(week_key, amount)
+
+        length = len(self.xp_series)
+        self._touch(('xp_series',), lambda: self.xp_series.truncate(length))
+        self.xp_series.add(user_id, week_key, amount)
+
+        self._record_user(user_id)
 
     def remove_xp(self, user_id, amount):
         user_id = str(user_id)
-        self.leaderboard[user_id]['xp'] = max(0, self.leaderboard[user_id]['xp'] - amount)
-        self._save_data(self.leaderboard_file, self.leaderboard)
+        self._touch_user(user_id)
+        user = self.leaderboard[user_id]
+        user.xp = max(0, user.xp - amount)
+        self._record_user(user_id)
 
     def add_badge(self, user_id, badge):
         user_id = str(user_id)
-        if 'badges' not in self.leaderboard[user_id]:
-            self.leaderboard[user_id]['badges'] = []
-        if badge not in self.leaderboard[user_id]['badges']:
-            self.leaderboard[user_id]['badges'].append(badge)
-        self._save_data(self.leaderboard_file, self.leaderboard)
+        self._touch_user(user_id)
+        if self.leaderboard[user_id].add_badge(badge):
+            self._record_user(user_id)
 
     def get_user(self, user_id):
         return self.leaderboard.get(str(user_id))
@@ -76,56 +378,133 @@ class DataManager:
     def get_leaderboard(self):
         return self.leaderboard
 
-    def get_hall_of_fame(self):
-        return self.hall_of_fame
+    def get_archived_months(self):
+        return list(self.all_time['months'])
+
+    def get_month_archive(self, month_key):
+        return self.archive.get(month_key)
+
+    def get_all_time_top(self, limit=10):
+        users = self.all_time['users']
+        return [(user_id, users[user_id]) for user_id in self.all_time_index.top(limit)]
+
+    def get_all_time_snapshot(self):
+        users = self.all_time['users']
+        return RankSnapshot(
+            (user_id, users[user_id]['username'], users[user_id]['total_xp'])
+            for user_id in self.all_time_index.top(len(self.all_time_index))
+        )
 
     def get_user_rank(self, user_id):
-        sorted_users = sorted(self.leaderboard.items(), key=lambda x: x[1]['xp'], reverse=True)
-        rank = next((i + 1 for i, (uid, _) in enumerate(sorted_users) if uid == str(user_id)), 0)
-        return rank
-
-    def reset_monthly_leaderboard(self):
-        month_key = self.get_month_key()
-        
-        self.hall_of_fame[month_key] = dict(self.leaderboard)
-        self._save_data(self.hall_of_fame_file, self.hall_of_fame)
-        
-        for user_id in self.leaderboard:
-            self.leaderboard[user_id]['xp'] = 0
-        
-        self._save_data(self.leaderboard_file, self.leaderboard)
+        return self.rank_index.rank(str(user_id))
+
+    def get_top_users(self, limit=10):
+        return [(user_id, self.leaderboard[user_id]) for user_id in self.rank_index.top(limit)]
+
+    def get_leaderboard_snapshot(self):
+        # The index is already sorted, so this is a single O(n) copy
+        users = self.leaderboard
+        return RankSnapshot(
+            (user_id, users[user_id].username, users[user_id].xp, len(users[user_id].badge_ids))
+            for user_id in self.rank_index.top(len(self.rank_index))
+        )
+
+    def get_period_snapshot(self, first_week, last_week):
+        users = self.leaderboard
+        return RankSnapshot(
+            (user_id, users[user_id].username, xp, len(users[user_id].badge_ids))
+            for user_id, xp in self.xp_series.totals(first_week, last_week)
+            if user_id in users
+        )
+
+    def reset_monthly_leaderboard(self, month_key=None):
+        month_key = month_key or self.get_month_key()
+        with self.transaction():
+            for user_id in self.leaderboard:
+                self._touch_user(user_id)
+            previous = self.archive.pending(month_key)
+            all_time = _clone(self.all_time)
+            self._touch(('month', month_key), lambda: self._restore_month(month_key, previous, all_time))
+
+            # A month archived again (e.g. /resetmonth, then the scheduled reset) is
+            # merged: the record holds the month's full archive, never just the zeroed board
+            archive = MonthArchive.merge(self.archive.get(month_key) or {}, MonthArchive.compact(self.leaderboard))
+            record = {'op': 'reset', 'month': month_key, 'archive': archive}
+            self._apply_reset(record)
+            self.rank_index.rebuild((user_id, 0) for user_id in self.leaderboard)
+            for user_id in record['archive']:
+                self.all_time_index.update(user_id, self.all_time['users'][user_id]['total_xp'])
+            self._record(record)
+
+    def _restore_month(self, month_key, previous, all_time):
+        self.archive.discard(month_key)
+        if previous is not None:
+            self.archive.put(month_key, previous)
+        self.all_time = all_time
+        self.all_time_index.rebuild((uid, data['total_xp']) for uid, data in all_time['users'].items())
 
     # Challenge management
     def create_challenge(self, challenge_data):
         challenge_id = len(self.challenges) + 1
         challenge_data['id'] = challenge_id
+        challenge_data.pop('submissions', None)
         self.challenges.append(challenge_data)
-        self._save_data(self.challenges_file, self.challenges)
+        self._challenge_index[challenge_id] = challenge_data
+        if challenge_data.get('status') == 'active':
+            self._active_challenge = challenge_data
+
+        def undo():
+            self.challenges.remove(challenge_data)
+            del self._challenge_index[challenge_id]
+            self._refresh_active_challenge()
+
+        self._touch(('challenge', challenge_id), undo)
+        self._record_challenge(challenge_data)
         return challenge_id
 
     def update_challenge(self, challenge_id, updates):
-        for challenge in self.challenges:
-            if challenge['id'] == challenge_id:
-                challenge.update(updates)
-                self._save_data(self.challenges_file, self.challenges)
-                return True
-        return False
+        challenge = self._challenge_index.get(challenge_id)
+        if challenge is None:
+            return False
+
+        before = dict(challenge)
+
+        def undo():
+            challenge.clear()
+            challenge.update(before)
+            self._refresh_active_challenge()
+
+        self._touch(('challenge', challenge_id), undo)
+        challenge.update(updates)
+        if 'status' in updates:
+            self._refresh_active_challenge()
+        self._record_challenge(challenge)
+        return True
+
+    def get_challenge(self, challenge_id):
+        return self._challenge_index.get(challenge_id)
 
     def get_active_challenge(self):
-        for challenge in reversed(self.challenges):
-            if challenge.get('status') == 'active':
-                return challenge
-        return None
+        return self._active_challenge
 
     def get_latest_challenge(self):
         return self.challenges[-1] if self.challenges else None
 
+    def get_submissions(self, challenge_id):
+        return self.submissions.get(challenge_id)
+
     def add_submission(self, challenge_id, submission_data):
-        for challenge in self.challenges:
-            if challenge['id'] == challenge_id:
-                if 'submissions' not in challenge:
-                    challenge['submissions'] = []
-                challenge['submissions'].append(submission_data)
-                self._save_data(self.challenges_file, self.challenges)
-                return True
-        return False
\ No newline at end of file
+        if challenge_id not in self._challenge_index:
+            return False
+        if not self.submissions.add(challenge_id, submission_data):
+            return True
+
+        if self._txn is not None:
+            self._touch(('submission', challenge_id, submission_data['message_id']),
+                        lambda: self.submissions.remove(challenge_id, submission_data))
+            self._txn.submissions.append((challenge_id, submission_data))
+            return True
+
+        self.submissions.queue(challenge_id, submission_data)
+        self._mark_dirty()
+        return True
@@ -1,7 +1,7 @@
 import discord
 from datetime import datetime
 
-def create_challenge_embed(title, description, difficulty, week, posted_by):
+def create_challenge_embed(title, description, difficulty, week, posted_by, submission_channel):
     color_map = {
         'easy': discord.Color.green(),
         'medium': discord.Color.orange(),
@@ -20,7 +20,7 @@ def create_challenge_embed(title, description, difficulty, week, posted_by):
     
     embed.add_field(
         name='📝 How to Submit',
-        value=f'Post your solution in `#code-wars-submissions`',
+        value=f'Post your solution in {submission_channel}',
         inline=False
     )
     
@@ -44,21 +44,18 @@ def create_submission_embed(user, challenge_title):
     embed.set_footer(text='Trainers will review your submission soon!')
     return embed
 
-def create_leaderboard_embed(sorted_users, month_key):
+def create_leaderboard_embed(rows, period, page=0, page_count=1, start=0,
+                             title='🏆 talAIt Monthly Leaderboard', footer='Updated monthly'):
     embed = discord.Embed(
-        title='🏆 talAIt Monthly Leaderboard',
-        description=f'**{month_key}**',
+        title=title,
+        description=f'**{period}**',
         color=discord.Color.gold()
     )
     
     medals = ['🥇', '🥈', '🥉']
     
-    for idx, (user_id, data) in enumerate(sorted_users):
+    for idx, (user_id, username, xp, badge_count) in enumerate(rows, start):
         medal = medals[idx] if idx < 3 else f'**{idx + 1}.**'
-        username = data['username']
-        xp = data['xp']
-        
-        badge_count = len(data.get('badges', []))
         badge_text = f' | 🏅 {badge_count} badges' if badge_count > 0 else ''
         
         embed.add_field(
@@ -67,11 +64,31 @@ def create_leaderboard_embed(sorted_users, month_key):
             inline=False
         )
     
-    embed.set_footer(text='Updated monthly • Top 10 shown')
+    embed.set_footer(text=f'{footer} • Page {page + 1}/{page_count}')
     embed.timestamp = datetime.now()
     
     return embed
 
+def create_hall_of_fame_embed(rows, page=0, page_count=1, start=0):
+    embed = discord.Embed(
+        title='🏛️ Hall of Fame - All Time Champions',
+        description='Top performers across all months',
+        color=discord.Color.purple()
+    )
+    
+    medals = ['🥇', '🥈', '🥉']
+    
+    for idx, (user_id, username, xp) in enumerate(rows, start):
+        medal = medals[idx] if idx < 3 else f'**{idx + 1}.**'
+        embed.add_field(
+            name=f'{medal} {username}',
+            value=f'{xp} Total XP',
+            inline=False
+        )
+    
+    embed.set_footer(text=f'All-time rankings • Page {page + 1}/{page_count}')
+    return embed
+
 def create_stats_embed(user_data, rank, discord_user):
     embed = discord.Embed(
         title=f'📊 Stats for {user_data["username"]}',
@@ -93,4 +110,101 @@ def create_stats_embed(user_data, rank, discord_user):
     
     embed.timestamp = datetime.now()
     
-    return embed
\ No newline at end of file
+    return embed
+
+def create_submissions_embed(challenge, submissions, names, guild_id, page, page_size):
+    page_count = max(1, -(-len(submissions) // page_size))
+    embed = discord.Embed(
+        title=f'📝 Submissions for: {challenge["title"]}',
+        description=f"Total submissions: **{len(submissions)}**",
+        color=discord.Color.blue()
+    )
+
+    start = page * page_size
+    for idx, sub in enumerate(submissions[start:start + page_size], start + 1):
+        embed.add_field(
+            name=f"{idx}. {names.get(sub['user_id'], 'Unknown user')}",
+            value=f"[View Submission](https://discord.com/channels/{guild_id}/{sub['channel_id']}/{sub['message_id']})",
+            inline=False
+        )
+
+    embed.set_footer(text=f'Page {page + 1}/{page_count}')
+    return embed
+
+def _ms(seconds):
+    return f'{seconds * 1000:.1f} ms'
+
+def _bytes(size):
+    for unit in ('B', 'KiB', 'MiB'):
+        if size < 1024:
+            return f'{size:.0f} {unit}'
+        size /= 1024
+    return f'{size:.1f} GiB'
+
+def create_botstats_embed(metrics, uptime, shards, pipeline_stats=None, broadcast_stats=None, guild_id=None):
+    embed = discord.Embed(title='📈 Bot Runtime Stats', color=discord.Color.dark_teal())
+
+    commands = sorted(
+        metrics.histograms('command_latency_seconds').items(),
+        key=lambda item: item[1].count, reverse=True
+    )
+    lines = []
+    for labels, histogram in commands[:10]:
+        name = dict(labels)['command']
+        errors = metrics.counter('command_errors_total', command=name)
+        error_text = f' • ❌ {errors}' if errors else ''
+        lines.append(
+            f'`/{name}` {histogram.count}× • avg {_ms(histogram.sum / histogram.count)}'
+            f' • p95 ≤ {_ms(histogram.quantile(0.95))}{error_text}'
+        )
+    embed.add_field(name='⚡ Commands', value='\n'.join(lines) or 'No commands yet', inline=False)
+
+    flushes = metrics.histograms('storage_flush_seconds').get(())
+    saves = metrics.histograms('storage_save_seconds')
+    written = {kind: metrics.counter('storage_written_bytes_total', kind=kind) for kind in ('journal', 'submissions', 'snapshot')}
+    storage = [f'Shards loaded: {shards}']
+    if flushes:
+        storage.append(f'Flushes: {flushes.count} • avg {_ms(flushes.sum / flushes.count)} • max {_ms(flushes.max)}')
+    for labels, histogram in sorted(saves.items()):
+        storage.append(f'`{dict(labels)["file"]}` saves: {histogram.count} • max {_ms(histogram.max)}')
+    storage.append('Written: ' + ' • '.join(f'{kind} {_bytes(size)}' for kind, size in written.items()))
+    hits, misses = (metrics.counter('ranking_cache_lookups_total', result=result) for result in ('hit', 'miss'))
+    if hits or misses:
+        storage.append(f'Ranking cache: {hits} hits • {misses} misses ({hits / (hits + misses):.0%} hit rate)')
+    embed.add_field(name='💾 Persistence', value='\n'.join(storage), inline=False)
+
+    lag = metrics.histograms('event_loop_lag_seconds').get(())
+    if lag:
+        embed.add_field(
+            name='🔁 Event Loop Lag',
+            value=f'p95 ≤ {_ms(lag.quantile(0.95))} • max {_ms(lag.max)} ({lag.count} samples)',
+            inline=False
+        )
+
+    if pipeline_stats:
+        embed.add_field(
+            name='📥 Submission Queue',
+            value=(
+                f"Depth {pipeline_stats['depth']}/{pipeline_stats['capacity']} • "
+                f"processed {pipeline_stats['processed']} in {pipeline_stats['batches']} batches • "
+                f"full waits {pipeline_stats['full_waits']}"
+            ),
+            inline=False
+        )
+
+    if broadcast_stats:
+        totals = {key: sum(stats[key] for stats in broadcast_stats.values()) for key in ('delivered', 'failed', 'retries')}
+        slowest = max(stats['max_latency'] for stats in broadcast_stats.values())
+        sends = [
+            f"{len(broadcast_stats)} guild(s) • delivered {totals['delivered']} • failed {totals['failed']} • "
+            f"retries {totals['retries']} • max {_ms(slowest)}"
+        ]
+        here = broadcast_stats.get(guild_id)
+        if here:
+            last = _ms(here['last_latency']) if here['last_latency'] is not None else 'n/a'
+            sends.append(f"This server: delivered {here['delivered']} • failed {here['failed']} • last {last}")
+        embed.add_field(name='📣 Broadcasts', value='\n'.join(sends), inline=False)
+
+    hours, rest = divmod(int(uptime), 3600)
+    embed.set_footer(text=f'Uptime {hours}h {rest // 60:02d}m')
+    return embed
@@ -0,0 +1,66 @@
+import json
+
+# Both are optional: without orjson the compact format falls back to the
+# stdlib encoder, and msgpack is only needed to read or write msgpack files
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# 'json' is the original pretty-printed layout (indent=4)
+FORMATS = ('json', 'json-compact', 'msgpack')
+
+_JSON_START = frozenset(b'{[')
+_WHITESPACE = frozenset(b' \t\r\n')
+
+def check_format(storage_format):
+    if storage_format not in FORMATS:
+        raise ValueError(f'Unknown storage format: {storage_format}')
+    if storage_format == 'msgpack' and msgpack is None:
+        raise RuntimeError('The msgpack storage format needs the msgpack package (pip install msgpack)')
+
+def detect(raw):
+    """Format of an encoded file, judged from its first bytes.
+
+    JSON documents here are always an object or array, so they start with
+    `{` or `[` (pretty-printed ones are followed by a newline); a msgpack
+    map or array starts with a type byte outside printable ASCII.
+    """
+    if not raw or raw[0] in _WHITESPACE:
+        return 'json'
+    if raw[0] in _JSON_START:
+        return 'json' if raw[1:2] == b'\n' else 'json-compact'
+    return 'msgpack'
+
+def matches(raw, storage_format):
+    """Whether `raw` is already encoded the way `storage_format` writes it.
+
+    Both JSON formats write an empty object or array as the same two bytes,
+    which detect() can only report as one of them.
+    """
+    if raw in (b'{}', b'[]'):
+        return storage_format in ('json', 'json-compact')
+    return detect(raw) == storage_format
+
+def dumps(data, storage_format):
+    if storage_format == 'msgpack':
+        return msgpack.packb(data)
+    if storage_format == 'json-compact':
+        if orjson is not None:
+            return orjson.dumps(data)
+        return json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode()
+    return json.dumps(data, indent=4).encode()
+
+def loads(raw):
+    if detect(raw) == 'msgpack':
+        if msgpack is None:
+            raise RuntimeError('Found a msgpack data file but the msgpack package is not installed')
+        return msgpack.unpackb(raw)
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
@@ -0,0 +1,132 @@
+import asyncio
+import json
+import os
+from utils.constants import GUILDS_DIR, LEGACY_GUILD_FILE, STORAGE_FORMAT
+from utils.metrics import registry, timed
+from utils.storage import create_data_manager
+
+class GuildDataRegistry:
+    """One storage shard per guild, opened the first time the guild is touched.
+
+    Every shard has its own files, flush lock and rank indexes, so a write in
+    one guild never rewrites or blocks another. The legacy top-level data
+    directory is kept as the shard for `legacy_guild_id` and for DMs; without
+    one, an install that predates sharding hands it to its only guild on the
+    first ready (see `adopt_legacy`).
+    """
+
+    def __init__(self, data_dir, backend, legacy_guild_id=None, storage_format=STORAGE_FORMAT):
+        self.data_dir = data_dir
+        self.backend = backend
+        self.storage_format = storage_format
+        self.legacy_path = os.path.join(data_dir, LEGACY_GUILD_FILE)
+        if not legacy_guild_id and os.path.exists(self.legacy_path):
+            with open(self.legacy_path, 'r') as f:
+                legacy_guild_id = json.load(f)['guild_id']
+        self.legacy_guild_id = int(legacy_guild_id) if legacy_guild_id else None
+        self._shards = {}
+        # Opens in flight on a worker; for_guild() waits on these instead of opening twice
+        self._opening = {}
+
+    def _key(self, guild_id):
+        if guild_id is None or int(guild_id) == self.legacy_guild_id:
+            return None
+        return int(guild_id)
+
+    def _shard_dir(self, key):
+        if key is None:
+            return self.data_dir
+        return os.path.join(self.data_dir, GUILDS_DIR, str(key))
+
+    def _open(self, key):
+        with timed('storage_load_seconds', backend=self.backend):
+            return create_data_manager(self.backend, self._shard_dir(key), self.storage_format)
+
+    def _add(self, key, shard):
+        self._shards[key] = shard
+        self._opening.pop(key, None)
+        registry.set('guild_shards_loaded', len(self._shards))
+        return shard
+
+    def for_guild(self, guild_id):
+        """The guild's shard, opened on the calling thread if nothing loaded it yet.
+
+        Code on the event loop should `await load()` first, as the slash
+        command middleware does, so that this is a dict lookup.
+        """
+        key = self._key(guild_id)
+        shard = self._shards.get(key)
+        if shard is not None:
+            return shard
+
+        opening = self._opening.get(key)
+        if opening is None:
+            return self._add(key, self._open(key))
+        try:
+            # An open already running on a worker: wait for it rather than open the files twice
+            return self._add(key, opening.result())
+        except Exception:
+            self._opening.pop(key, None)
+            raise
+
+    async def load(self, guild_id, executor):
+        """Open a guild's shard on `executor` instead of the event loop."""
+        key = self._key(guild_id)
+        if key in self._shards:
+            return self._shards[key]
+
+        opening = self._opening.get(key)
+        if opening is None:
+            opening = self._opening[key] = executor.submit(self._open, key)
+        try:
+            # A cancelled caller leaves the open running; the next caller picks it up
+            shard = await asyncio.shield(asyncio.wrap_future(opening))
+        except Exception:
+            if self._opening.get(key) is opening:
+                del self._opening[key]
+            raise
+        return self._shards.get(key) or self._add(key, shard)
+
+    @staticmethod
+    def _has_data(shard):
+        return bool(shard.get_top_users(1) or shard.get_latest_challenge() or shard.get_archived_months())
+
+    async def adopt_legacy(self, guild_ids, executor):
+        """Let the only guild of a pre-sharding install keep the top-level data.
+
+        Runs once: the adopted guild is saved to LEGACY_GUILD_FILE. Nothing is
+        adopted when the bot is in several guilds, the top-level shard is empty
+        or the guild already has data of its own.
+        """
+        if self.legacy_guild_id is not None or len(guild_ids) != 1:
+            return
+        key = int(guild_ids[0])
+        if not self._has_data(await self.load(None, executor)):
+            return
+        if key in self._shards or os.path.exists(self._shard_dir(key)):
+            shard = await self.load(key, executor)
+            if self._has_data(shard):
+                return
+            # Only the empty shard an earlier start created; DMs use the top-level one
+            self._shards.pop(key)
+            registry.set('guild_shards_loaded', len(self._shards))
+            await shard.flush()
+            shard.close()
+
+        self.legacy_guild_id = key
+        tmp_path = f'{self.legacy_path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'guild_id': key}, f)
+        os.replace(tmp_path, self.legacy_path)
+        print(f'📦 Existing data in {self.data_dir}/ now belongs to guild {key}')
+
+    def loaded(self):
+        return list(self._shards.values())
+
+    async def flush(self):
+        for shard in self.loaded():
+            await shard.flush()
+
+    def close(self):
+        for shard in self.loaded():
+            shard.close()
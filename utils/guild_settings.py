@@ -0,0 +1,65 @@
+import asyncio
+import json
+import os
+import threading
+
+class GuildSettings:
+    """Small per-guild configuration store (schedules, timezone, ...).
+
+    Changes made in the same loop iteration (e.g. every guild indexing its
+    channels on ready) are written once, in the executor.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._settings = {}
+        self._dirty = False
+        self._save_task = None
+        self._write_lock = threading.Lock()
+        if os.path.exists(self.path):
+            with open(self.path, 'r') as f:
+                self._settings = json.load(f)
+
+    def get(self, guild_id, key, default=None):
+        return self._settings.get(str(guild_id), {}).get(key, default)
+
+    def set(self, guild_id, key, value):
+        self._settings.setdefault(str(guild_id), {})[key] = value
+        self._save()
+
+    def _write(self, text):
+        with self._write_lock:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_path = f'{self.path}.tmp'
+            with open(tmp_path, 'w') as f:
+                f.write(text)
+            os.replace(tmp_path, self.path)
+
+    def _save(self):
+        self._dirty = True
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop (scripts): write straight away
+            self.flush_sync()
+            return
+        if self._save_task is None or self._save_task.done():
+            self._save_task = loop.create_task(self._save_loop(), name='guild-settings-save')
+
+    async def _save_loop(self):
+        loop = asyncio.get_running_loop()
+        while self._dirty:
+            self._dirty = False
+            try:
+                await loop.run_in_executor(None, self._write, json.dumps(self._settings, indent=4))
+            except OSError as e:
+                print(f'❌ Error saving guild settings: {e}')
+
+    async def flush(self):
+        while self._save_task is not None and not self._save_task.done():
+            await asyncio.shield(self._save_task)
+
+    def flush_sync(self):
+        if self._dirty:
+            self._dirty = False
+            self._write(json.dumps(self._settings, indent=4))
@@ -0,0 +1,77 @@
+import asyncio
+import discord
+from utils.metrics import registry
+
+class _ResponseState:
+    __slots__ = ('lock', 'timer', 'task', 'deferred_ephemeral', 'followed_up')
+
+    def __init__(self):
+        # Serializes the auto-defer against the command's own reply
+        self.lock = asyncio.Lock()
+        self.timer = None
+        self.task = None
+        self.deferred_ephemeral = None
+        self.followed_up = False
+
+def _state(interaction):
+    state = interaction.extras.get('response_state')
+    if state is None:
+        state = interaction.extras['response_state'] = _ResponseState()
+    return state
+
+def arm_auto_defer(interaction, delay):
+    """Defer `interaction` if the command hasn't answered it within `delay` seconds.
+
+    The deferral is ephemeral when the command is declared with
+    `extras={'ephemeral': True}`. Commands answer through `respond`, which
+    turns into a follow-up once the interaction has been deferred.
+    """
+    state = _state(interaction)
+    command = interaction.command
+    ephemeral = bool(command and command.extras.get('ephemeral'))
+
+    def fire():
+        state.timer = None
+        state.task = asyncio.create_task(_auto_defer(interaction, ephemeral))
+
+    state.timer = asyncio.get_running_loop().call_later(delay, fire)
+
+def disarm(interaction):
+    state = interaction.extras.get('response_state')
+    if state is not None and state.timer is not None:
+        state.timer.cancel()
+        state.timer = None
+
+async def _auto_defer(interaction, ephemeral):
+    try:
+        deferred = await defer(interaction, ephemeral=ephemeral)
+    except discord.HTTPException as e:
+        print(f'❌ Error deferring /{interaction.command.qualified_name}: {e}')
+        return
+    if deferred:
+        registry.inc('commands_auto_deferred_total', command=interaction.command.qualified_name)
+
+async def defer(interaction, *, ephemeral=False):
+    """Acknowledge the interaction now; False if it was already answered."""
+    state = _state(interaction)
+    async with state.lock:
+        disarm(interaction)
+        if interaction.response.is_done():
+            return False
+        await interaction.response.defer(ephemeral=ephemeral)
+        state.deferred_ephemeral = ephemeral
+        return True
+
+async def respond(interaction, content=None, *, ephemeral=False, **kwargs):
+    """Reply to a slash command, as a follow-up if it was already deferred."""
+    state = _state(interaction)
+    async with state.lock:
+        disarm(interaction)
+        if not interaction.response.is_done():
+            await interaction.response.send_message(content, ephemeral=ephemeral, **kwargs)
+            return
+        if not state.followed_up and state.deferred_ephemeral not in (None, ephemeral):
+            # The first follow-up replaces the "thinking" message and keeps its visibility
+            await interaction.delete_original_response()
+        state.followed_up = True
+        await interaction.followup.send(content, ephemeral=ephemeral, **kwargs)
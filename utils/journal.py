@@ -0,0 +1,122 @@
+import json
+import os
+import threading
+
+def read_lines(path):
+    """Records of a JSON-lines log, and the byte size of its intact prefix.
+
+    A crash can leave a torn last line. It and anything after it were never
+    acknowledged, so they are not part of the log.
+    """
+    records, size = [], 0
+    with open(path, 'rb') as f:
+        for line in f:
+            if not line.endswith(b'\n'):
+                break
+            if line.strip():
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    break
+            size += len(line)
+    return records, size
+
+def truncate_torn_tail(path, size):
+    """Cut a log back to its intact prefix before appending to it.
+
+    Otherwise the next record would be fused onto the torn fragment and be
+    unreadable, together with everything appended after it.
+    """
+    if os.path.exists(path) and os.path.getsize(path) > size:
+        with open(path, 'r+b') as f:
+            f.truncate(size)
+            f.flush()
+            os.fsync(f.fileno())
+
+class Journal:
+    """Append-only log of DataManager mutations.
+
+    Every record holds the resulting state of whatever it touched (a whole
+    user, a challenge header, a submission keyed by message id), so replaying
+    a record that is already part of the snapshot is harmless. That lets a
+    snapshot be written while new records keep arriving.
+
+    Records are buffered by `append` and only reach the file through `write`,
+    so the caller decides when (and on which thread) the disk I/O happens.
+    """
+
+    def __init__(self, path, compact_threshold):
+        self.path = path
+        self.rotated_path = f'{path}.compacting'
+        self.compact_threshold = compact_threshold
+        self._lock = threading.Lock()
+        self._pending = []
+        # Opened on first write, once any torn tail has been cut off
+        self._file = None
+        self._intact_size = None
+        self.size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+
+    def read(self):
+        for path in (self.rotated_path, self.path):
+            if not os.path.exists(path):
+                continue
+            records, size = read_lines(path)
+            if path == self.path:
+                self._intact_size = size
+            yield from records
+
+    def _open(self):
+        if self._file is not None:
+            return
+        if self._intact_size is None:
+            self._intact_size = read_lines(self.path)[1] if os.path.exists(self.path) else 0
+        truncate_torn_tail(self.path, self._intact_size)
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self.size = self._intact_size
+
+    def append(self, record):
+        self._pending.append(json.dumps(record, separators=(',', ':')) + '\n')
+
+    def has_pending(self):
+        return bool(self._pending)
+
+    def take_pending(self):
+        lines, self._pending = self._pending, []
+        return lines
+
+    def write(self, lines):
+        if not lines:
+            return
+        chunk = ''.join(lines)
+        with self._lock:
+            self._open()
+            self._file.write(chunk)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.size += len(chunk)
+
+    def has_rotated(self):
+        return os.path.exists(self.rotated_path)
+
+    def needs_compaction(self):
+        return self.size >= self.compact_threshold and not self.has_rotated()
+
+    def rotate(self):
+        with self._lock:
+            self._open()
+            self._file.close()
+            os.replace(self.path, self.rotated_path)
+            self._file = open(self.path, 'a', encoding='utf-8')
+            self._intact_size = 0
+            self.size = 0
+
+    def discard_rotated(self):
+        if self.has_rotated():
+            os.remove(self.rotated_path)
+
+    def close(self):
+        self.write(self.take_pending())
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,177 @@
+import asyncio
+import bisect
+import os
+import threading
+import time
+
+STARTED = time.monotonic()
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1024, 16 * 1024, 128 * 1024, 1024 ** 2, 8 * 1024 ** 2, 64 * 1024 ** 2)
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th observation."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return self.max
+
+class Metrics:
+    """In-process counters, gauges and histograms.
+
+    Updates come from the event loop and from executor threads (persistence),
+    so every access goes through one lock; each update is a dict lookup and
+    a few additions. Nothing is exported over the network: `render` produces
+    Prometheus text that MetricsReporter writes to a file.
+    """
+
+    def __init__(self, prefix='talait'):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+
+    @staticmethod
+    def _labels(labels):
+        return tuple(sorted(labels.items())) if labels else ()
+
+    def inc(self, name, amount=1, **labels):
+        key = self._labels(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            self._gauges.setdefault(name, {})[self._labels(labels)] = value
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = self._labels(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def counter(self, name, **labels):
+        with self._lock:
+            return self._counters.get(name, {}).get(self._labels(labels), 0)
+
+    def gauge(self, name, default=None, **labels):
+        with self._lock:
+            return self._gauges.get(name, {}).get(self._labels(labels), default)
+
+    def histograms(self, name):
+        """{labels dict items: Histogram} for one histogram family."""
+        with self._lock:
+            return dict(self._histograms.get(name, {}))
+
+    def render(self):
+        def label_text(key, extra=()):
+            pairs = list(key) + list(extra)
+            if not pairs:
+                return ''
+            return '{' + ','.join(f'{k}="{v}"' for k, v in pairs) + '}'
+
+        lines = []
+        with self._lock:
+            for kind, families in (('counter', self._counters), ('gauge', self._gauges)):
+                for name, series in sorted(families.items()):
+                    lines.append(f'# TYPE {self.prefix}_{name} {kind}')
+                    for key, value in sorted(series.items()):
+                        lines.append(f'{self.prefix}_{name}{label_text(key)} {value}')
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f'# TYPE {self.prefix}_{name} histogram')
+                for key, histogram in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets + ('+Inf',), histogram.counts):
+                        cumulative += count
+                        lines.append(f'{self.prefix}_{name}_bucket{label_text(key, [("le", bound)])} {cumulative}')
+                    lines.append(f'{self.prefix}_{name}_sum{label_text(key)} {histogram.sum}')
+                    lines.append(f'{self.prefix}_{name}_count{label_text(key)} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+# Shared by the bot and every storage shard
+registry = Metrics()
+
+class timed:
+    """Context manager observing the block's duration into a histogram."""
+
+    def __init__(self, name, **labels):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        registry.observe(self.name, time.perf_counter() - self.started, **self.labels)
+        return False
+
+class MetricsReporter:
+    """Samples event-loop lag on a timer and periodically writes the metrics file.
+
+    Lag is how late a fixed-interval sleep wakes up: anything blocking the
+    loop (a slow handler, a synchronous save) shows up directly.
+    """
+
+    def __init__(self, path, interval, write_every):
+        self.path = path
+        self.interval = interval
+        self.write_every = write_every
+        self._task = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name='metrics-reporter')
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self.write()
+
+    def write(self):
+        registry.set('uptime_seconds', time.monotonic() - STARTED)
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(registry.render())
+        os.replace(tmp_path, self.path)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        ticks = 0
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            registry.observe('event_loop_lag_seconds', lag)
+            ticks += 1
+            if ticks % self.write_every == 0:
+                try:
+                    await loop.run_in_executor(None, self.write)
+                except OSError as e:
+                    print(f'❌ Error writing metrics: {e}')
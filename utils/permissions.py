@@ -0,0 +1,93 @@
+from utils.constants import TRAINER_ROLE_NAMES
+
+# Permission bits
+TRAINER = 1 << 0  # challenges, winners, XP changes
+ADMIN = 1 << 1  # bot configuration; Discord administrators, who are trainers too
+
+class RoleAuthorizer:
+    """Per-guild trainer roles by ID, and each member's permission bits.
+
+    Guilds configure their trainer roles in their settings
+    (`trainer_role_ids`). A guild without that setting gets it seeded once
+    from the roles named in TRAINER_ROLE_NAMES; from then on roles are
+    tracked by ID, so renaming one doesn't change who is a trainer. A
+    member's bits are computed on first check and cached until one of the
+    member, role or guild events below invalidates them, making a check a
+    dict lookup and a bitwise and.
+    """
+
+    def __init__(self, guild_settings):
+        self.guild_settings = guild_settings
+        self._role_bits = {}
+        self._members = {}
+
+    def trainer_role_ids(self, guild):
+        role_ids = self.guild_settings.get(guild.id, 'trainer_role_ids')
+        if role_ids is None:
+            role_ids = [role.id for role in guild.roles if role.name.lower() in TRAINER_ROLE_NAMES]
+            if role_ids:
+                self.guild_settings.set(guild.id, 'trainer_role_ids', role_ids)
+        return role_ids
+
+    def set_trainer_role_ids(self, guild, role_ids):
+        self.guild_settings.set(guild.id, 'trainer_role_ids', sorted(set(role_ids)))
+        self.invalidate_guild(guild.id)
+
+    def _guild_role_bits(self, guild):
+        role_bits = self._role_bits.get(guild.id)
+        if role_bits is None:
+            role_bits = self._role_bits[guild.id] = dict.fromkeys(self.trainer_role_ids(guild), TRAINER)
+        return role_bits
+
+    def _compute(self, member):
+        role_bits = self._guild_role_bits(member.guild)
+        bits = 0
+        for role in member.roles:
+            bits |= role_bits.get(role.id, 0)
+        if member.guild_permissions.administrator:
+            bits |= ADMIN | TRAINER
+        return bits
+
+    def permissions(self, member):
+        guild = getattr(member, 'guild', None)
+        if guild is None:
+            # Users outside a guild (DMs) hold no roles
+            return 0
+        members = self._members.setdefault(guild.id, {})
+        bits = members.get(member.id)
+        if bits is None:
+            bits = members[member.id] = self._compute(member)
+        return bits
+
+    def has(self, member, permission):
+        return self.permissions(member) & permission == permission
+
+    # Invalidation, driven by gateway events
+    def invalidate_guild(self, guild_id):
+        self._role_bits.pop(guild_id, None)
+        self._members.pop(guild_id, None)
+
+    def member_updated(self, member):
+        self._members.get(member.guild.id, {}).pop(member.id, None)
+
+    def role_added(self, role):
+        # Covers both new roles and renames into a default name, for unconfigured guilds only
+        if role.name.lower() not in TRAINER_ROLE_NAMES:
+            return
+        if self.guild_settings.get(role.guild.id, 'trainer_role_ids') is None:
+            # Seeds from every default-named role, not just this one
+            self.invalidate_guild(role.guild.id)
+            self.trainer_role_ids(role.guild)
+
+    def role_updated(self, before, after):
+        if before.permissions != after.permissions:
+            self._members.pop(after.guild.id, None)
+        if before.name != after.name:
+            self.role_added(after)
+
+    def role_removed(self, role):
+        role_ids = self.guild_settings.get(role.guild.id, 'trainer_role_ids')
+        if role_ids and role.id in role_ids:
+            self.set_trainer_role_ids(role.guild, [role_id for role_id in role_ids if role_id != role.id])
+        else:
+            self._members.pop(role.guild.id, None)
@@ -0,0 +1,102 @@
+import asyncio
+import time
+
+class SubmissionPipeline:
+    """Bounded queue between `on_message` and DataManager.
+
+    Accepted submissions are queued and a single worker drains them in
+    batches: every batch is recorded with one transaction per guild, then all
+    of its confirmation reactions are sent concurrently.
+    """
+
+    def __init__(self, maxsize, batch_size):
+        self.batch_size = batch_size
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self._worker = None
+
+        # Backpressure metrics
+        self.enqueued = 0
+        self.processed = 0
+        self.batches = 0
+        self.failed_confirmations = 0
+        self.max_depth = 0
+        self.full_waits = 0
+        self.total_wait = 0.0
+        self.last_batch_size = 0
+        self.last_batch_seconds = 0.0
+
+    def start(self):
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run(), name='submission-pipeline')
+
+    async def stop(self):
+        # Let queued submissions land before the worker goes away
+        if self._worker is not None and not self._worker.done():
+            await self.queue.join()
+            self._worker.cancel()
+        self._worker = None
+
+    async def submit(self, data_manager, challenge_id, submission, message):
+        item = (data_manager, challenge_id, submission, message)
+        if self.queue.full():
+            self.full_waits += 1
+            started = time.perf_counter()
+            await self.queue.put(item)
+            self.total_wait += time.perf_counter() - started
+        else:
+            self.queue.put_nowait(item)
+        self.enqueued += 1
+        self.max_depth = max(self.max_depth, self.queue.qsize())
+
+    def stats(self):
+        return {
+            'depth': self.queue.qsize(),
+            'capacity': self.queue.maxsize,
+            'enqueued': self.enqueued,
+            'processed': self.processed,
+            'batches': self.batches,
+            'failed_confirmations': self.failed_confirmations,
+            'max_depth': self.max_depth,
+            'full_waits': self.full_waits,
+            'total_wait': self.total_wait,
+            'last_batch_size': self.last_batch_size,
+            'last_batch_seconds': self.last_batch_seconds,
+        }
+
+    async def _run(self):
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            try:
+                await self._process(batch)
+            except Exception as e:
+                print(f'❌ Error processing submission batch: {e}')
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def _process(self, batch):
+        started = time.perf_counter()
+
+        by_guild = {}
+        for data_manager, challenge_id, submission, _ in batch:
+            by_guild.setdefault(data_manager, []).append((challenge_id, submission))
+        for data_manager, submissions in by_guild.items():
+            with data_manager.transaction():
+                for challenge_id, submission in submissions:
+                    data_manager.add_submission(challenge_id, submission)
+
+        results = await asyncio.gather(
+            *(message.add_reaction('✅') for *_, message in batch),
+            return_exceptions=True
+        )
+        self.failed_confirmations += sum(1 for result in results if isinstance(result, Exception))
+
+        self.processed += len(batch)
+        self.batches += 1
+        self.last_batch_size = len(batch)
+        self.last_batch_seconds = time.perf_counter() - started
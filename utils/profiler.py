@@ -0,0 +1,139 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from datetime import datetime
+from utils.metrics import registry
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+
+def collapse(frame):
+    """One `root;...;leaf` line for a stack, as flamegraph tools expect."""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+class SamplingProfiler:
+    """Samples the event loop thread's stack from a side thread.
+
+    Nothing is installed on the profiled thread (no sys.setprofile), so the
+    only cost is the GIL hand-off per sample; counts of identical stacks are
+    written in collapsed format (`stack count` per line), ready for
+    flamegraph.pl, speedscope or similar.
+    """
+
+    def __init__(self, directory, interval):
+        self.directory = directory
+        self.interval = interval
+        self.running = False
+
+    def _sample(self, thread_id, duration):
+        counts = Counter()
+        deadline = time.monotonic() + duration
+        while time.monotonic() < deadline:
+            frame = sys._current_frames().get(thread_id)
+            if frame is not None:
+                counts[collapse(frame)] += 1
+            del frame
+            time.sleep(self.interval)
+        return counts
+
+    def _write(self, counts):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f'profile-{datetime.now():%Y%m%d-%H%M%S}.folded')
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in counts.most_common():
+                f.write(f'{stack} {count}\n')
+        return path
+
+    async def profile(self, duration):
+        """Profile the calling loop for `duration` seconds; returns (path, counts)."""
+        if self.running:
+            raise RuntimeError('A profile is already running')
+        self.running = True
+        loop = asyncio.get_running_loop()
+        done = loop.create_future()
+        thread_id = threading.get_ident()
+
+        def run():
+            try:
+                result = self._sample(thread_id, duration)
+            except Exception as e:
+                loop.call_soon_threadsafe(done.set_exception, e)
+            else:
+                loop.call_soon_threadsafe(done.set_result, result)
+
+        # A dedicated thread, so a long profile never holds an executor worker
+        threading.Thread(target=run, name='sampling-profiler', daemon=True).start()
+        try:
+            counts = await done
+            path = await loop.run_in_executor(None, self._write, counts)
+        finally:
+            self.running = False
+        return path, counts
+
+class LoopWatchdog:
+    """Always-on detector for callbacks that block the event loop.
+
+    The loop bumps a heartbeat every `threshold / 4` seconds. A watchdog
+    thread checks it on the same cadence; once the heartbeat is more than
+    `threshold` late it logs the loop thread's stack right then, while the
+    offending callback is still running. The stall's full length is
+    recorded when the heartbeat resumes.
+    """
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.interval = threshold / 4
+        self._loop = None
+        self._thread_id = None
+        self._beat = time.monotonic()
+        self._handle = None
+        self._stop = threading.Event()
+
+    def start(self):
+        if self._loop is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._thread_id = threading.get_ident()
+        self._stop.clear()
+        self._heartbeat()
+        threading.Thread(target=self._watch, name='loop-watchdog', daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        self._loop = None
+
+    def _heartbeat(self):
+        now = time.monotonic()
+        stall = now - self._beat - self.interval
+        if stall > self.threshold:
+            registry.inc('slow_callbacks_total')
+            registry.observe('slow_callback_seconds', stall)
+            print(f'🐢 Event loop was blocked for {stall * 1000:.0f} ms')
+        self._beat = now
+        self._handle = self._loop.call_later(self.interval, self._heartbeat)
+
+    def _watch(self):
+        reported = None
+        while not self._stop.wait(self.interval):
+            beat = self._beat
+            if beat == reported or time.monotonic() - beat - self.interval <= self.threshold:
+                continue
+            reported = beat
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is None:
+                continue
+            stack = ''.join(traceback.format_stack(frame))
+            del frame
+            print(f'🐢 Event loop blocked for over {self.threshold * 1000:.0f} ms, currently at:\n{stack}')
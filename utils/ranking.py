@@ -0,0 +1,83 @@
+from sortedcontainers import SortedList
+
+class RankIndex:
+    """Incrementally maintained ranking of user ids by score.
+
+    Entries are kept sorted by (-score, user_id), so higher scores come first
+    and ties always resolve the same way. Lookups and updates are O(log n);
+    reading the top k is O(log n + k).
+    """
+
+    def __init__(self, scores=None):
+        self._scores = {}
+        self._order = SortedList()
+        if scores:
+            self.rebuild(scores)
+
+    def __len__(self):
+        return len(self._scores)
+
+    def __contains__(self, user_id):
+        return user_id in self._scores
+
+    def rebuild(self, scores):
+        self._scores = dict(scores)
+        self._order = SortedList((-score, user_id) for user_id, score in self._scores.items())
+
+    def update(self, user_id, score):
+        old = self._scores.get(user_id)
+        if old == score:
+            return
+        if old is not None:
+            self._order.remove((-old, user_id))
+        self._scores[user_id] = score
+        self._order.add((-score, user_id))
+
+    def remove(self, user_id):
+        old = self._scores.pop(user_id, None)
+        if old is not None:
+            self._order.remove((-old, user_id))
+
+    def score(self, user_id):
+        return self._scores.get(user_id)
+
+    def rank(self, user_id):
+        score = self._scores.get(user_id)
+        if score is None:
+            return 0
+        return self._order.bisect_left((-score, user_id)) + 1
+
+    def top(self, k, start=0):
+        return [user_id for _, user_id in self._order.islice(start, start + k)]
+
+class RankSnapshot:
+    """Immutable ranking frozen at one data version.
+
+    Rows are `(user_id, username, score, ...)` tuples in rank order, copied out
+    of the live data, so a paginated view keeps showing a consistent ranking
+    while XP changes underneath it, and flipping pages is a slice.
+    """
+
+    def __init__(self, rows):
+        self.rows = tuple(rows)
+        self._positions = None
+
+    def __len__(self):
+        return len(self.rows)
+
+    def page_count(self, page_size):
+        return max(1, -(-len(self.rows) // page_size))
+
+    def page(self, page, page_size):
+        start = page * page_size
+        return self.rows[start:start + page_size]
+
+    def position(self, user_id):
+        # Built on the first lookup only; most views never jump
+        if self._positions is None:
+            self._positions = {row[0]: index for index, row in enumerate(self.rows)}
+        return self._positions.get(str(user_id))
+
+    def page_of(self, user_id, page_size):
+        position = self.position(user_id)
+        return None if position is None else position // page_size
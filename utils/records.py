@@ -0,0 +1,174 @@
+import re
+import sys
+from array import array
+from utils.xp_series import parse_week_key, week_key
+
+_WEEK_KEY = re.compile(r'week_(\d+)$')
+
+# Badge strings are shared by many users; each record keeps indexes into this table
+_badge_table = []
+_badge_ids = {}
+
+def _badge_id(badge):
+    badge_id = _badge_ids.get(badge)
+    if badge_id is None:
+        badge_id = len(_badge_table)
+        _badge_table.append(sys.intern(badge))
+        _badge_ids[badge] = badge_id
+    return badge_id
+
+def _encode_week(key):
+    parsed = parse_week_key(key)
+    if parsed is not None:
+        return parsed[0] * 100 + parsed[1]
+    match = _WEEK_KEY.match(key)
+    if match is not None and int(match.group(1)) < 100:
+        return int(match.group(1))
+    return None
+
+def _decode_week(code):
+    return week_key(*divmod(code, 100)) if code >= 100 else f'week_{code}'
+
+class UserRecord:
+    """Leaderboard entry stored in slots instead of nested dicts.
+
+    Week XP lives in one flat int array of (week code, xp) pairs, where ISO
+    `YYYY-Www` keys are coded as YYYY * 100 + ww and legacy `week_<n>` keys
+    (no year) as plain n; badges are a tuple of indexes into a process-wide
+    table. A user costs one object plus at most one array instead of three
+    containers. Week keys in any other shape are kept in a dict that only
+    exists when needed. Reads go through the same keys as the
+    leaderboard.json entries (`record['xp']`, `record.get('badges', [])`)
+    and `to_dict` produces exactly that schema for snapshots and the journal.
+    """
+
+    __slots__ = ('username', 'xp', 'total_xp', 'weeks', 'other_weeks', 'badge_ids')
+
+    _FIELDS = ('username', 'xp', 'weekly_xp', 'total_xp', 'badges')
+
+    def __init__(self, username, xp=0, total_xp=0):
+        self.username = sys.intern(username)
+        self.xp = xp
+        self.total_xp = total_xp
+        self.weeks = None
+        self.other_weeks = None
+        self.badge_ids = ()
+
+    @classmethod
+    def from_dict(cls, data):
+        record = cls(data['username'], data.get('xp', 0), data.get('total_xp', 0))
+        for week_key, amount in data.get('weekly_xp', {}).items():
+            record.add_week_xp(week_key, amount)
+        for badge in data.get('badges', []):
+            record.add_badge(badge)
+        return record
+
+    def to_dict(self):
+        return {
+            'username': self.username,
+            'xp': self.xp,
+            'weekly_xp': self.weekly_xp,
+            'total_xp': self.total_xp,
+            'badges': self.badges
+        }
+
+    def copy(self):
+        record = UserRecord.__new__(UserRecord)
+        record.username = self.username
+        record.xp = self.xp
+        record.total_xp = self.total_xp
+        record.weeks = array('i', self.weeks) if self.weeks else None
+        record.other_weeks = dict(self.other_weeks) if self.other_weeks else None
+        record.badge_ids = self.badge_ids
+        return record
+
+    @property
+    def weekly_xp(self):
+        weeks = self.weeks or ()
+        weekly_xp = {_decode_week(weeks[index]): weeks[index + 1] for index in range(0, len(weeks), 2)}
+        if self.other_weeks:
+            weekly_xp.update(self.other_weeks)
+        return weekly_xp
+
+    def iso_weeks(self):
+        """(ISO week key, xp) pairs, skipping legacy year-less weeks."""
+        weeks = self.weeks or ()
+        for index in range(0, len(weeks), 2):
+            if weeks[index] >= 100:
+                yield _decode_week(weeks[index]), weeks[index + 1]
+
+    @property
+    def badges(self):
+        return [_badge_table[badge_id] for badge_id in self.badge_ids]
+
+    def add_week_xp(self, key, amount):
+        week = _encode_week(key)
+        if week is None:
+            if self.other_weeks is None:
+                self.other_weeks = {}
+            self.other_weeks[key] = self.other_weeks.get(key, 0) + amount
+            return
+
+        if self.weeks is None:
+            self.weeks = array('i')
+        for index in range(0, len(self.weeks), 2):
+            if self.weeks[index] == week:
+                self.weeks[index + 1] += amount
+                return
+        self.weeks.extend((week, amount))
+
+    def add_badge(self, badge):
+        badge_id = _badge_id(badge)
+        if badge_id in self.badge_ids:
+            return False
+        # Badges are rare and small, so an immutable tuple beats an array here
+        self.badge_ids += (badge_id,)
+        return True
+
+    # Read access shaped like the leaderboard.json dicts
+    def __getitem__(self, key):
+        if key not in self._FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key):
+        return key in self._FIELDS
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self._FIELDS else default
+
+    def __eq__(self, other):
+        if isinstance(other, UserRecord):
+            other = other.to_dict()
+        return self.to_dict() == other
+
+    __hash__ = None
+
+def _memory_report(user_count=100_000):
+    import tracemalloc
+
+    def build(factory):
+        tracemalloc.start()
+        users = {
+            str(10**17 + n): factory({
+                'username': f'user{n}',
+                'xp': n % 50,
+                'weekly_xp': {f'week_{week}': 2 for week in range(1, 1 + n % 8)},
+                'total_xp': n % 400,
+                'badges': [f'🥇 Winner W{week}' for week in range(n % 3)]
+            })
+            for n in range(user_count)
+        }
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del users
+        return size
+
+    as_dicts = build(lambda data: data)
+    as_records = build(UserRecord.from_dict)
+    print(f'{user_count} users as dicts:   {as_dicts / 2**20:8.1f} MiB')
+    print(f'{user_count} users as records: {as_records / 2**20:8.1f} MiB')
+    print(f'Saved: {(as_dicts - as_records) / 2**20:.1f} MiB ({1 - as_records / as_dicts:.0%})')
+
+if __name__ == '__main__':
+    _memory_report(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,31 @@
+from collections import OrderedDict
+from utils.metrics import registry
+
+class RenderCache:
+    """LRU of ranking snapshots, each tagged with the data version it was taken at.
+
+    A lookup with the same key and version returns the stored RankSnapshot
+    without querying the data at all; any mutation bumps the storage version,
+    so the next lookup takes a new snapshot once and every request after it
+    hits again. Embeds are not cached: each page is rendered from the
+    snapshot when it is shown. Hits and misses go to the metrics registry.
+    """
+
+    def __init__(self, cache_size):
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+
+    def get(self, key, version, render):
+        entry = self._cache.get(key)
+        if entry is not None and entry[0] == version:
+            self._cache.move_to_end(key)
+            registry.inc('ranking_cache_lookups_total', result='hit')
+            return entry[1]
+
+        registry.inc('ranking_cache_lookups_total', result='miss')
+        payload = render()
+        self._cache[key] = (version, payload)
+        self._cache.move_to_end(key)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return payload
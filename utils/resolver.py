@@ -0,0 +1,52 @@
+import asyncio
+import time
+import discord
+
+class UserResolver:
+    """Resolves user ids to display names with as few REST calls as possible.
+
+    Lookups go guild member cache -> client user cache -> local TTL cache,
+    and only the remaining misses are fetched, concurrently and bounded by a
+    semaphore.
+    """
+
+    def __init__(self, bot, ttl, concurrency):
+        self.bot = bot
+        self.ttl = ttl
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._cache = {}
+
+    def _cached(self, guild, user_id):
+        member = guild.get_member(user_id) if guild else None
+        if member:
+            return member.name
+        user = self.bot.get_user(user_id)
+        if user:
+            return user.name
+        entry = self._cache.get(user_id)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        return None
+
+    def resolve_cached(self, guild, user_ids):
+        names, misses = {}, []
+        for user_id in dict.fromkeys(user_ids):
+            name = self._cached(guild, user_id)
+            if name is None:
+                misses.append(user_id)
+            else:
+                names[user_id] = name
+        return names, misses
+
+    async def _fetch(self, user_id):
+        async with self._semaphore:
+            try:
+                user = await self.bot.fetch_user(user_id)
+            except discord.HTTPException:
+                return f'Unknown user ({user_id})'
+        self._cache[user_id] = (time.monotonic() + self.ttl, user.name)
+        return user.name
+
+    async def fetch_missing(self, misses):
+        names = await asyncio.gather(*(self._fetch(user_id) for user_id in misses))
+        return dict(zip(misses, names))
@@ -0,0 +1,249 @@
+import asyncio
+import heapq
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+# Long sleeps are re-checked against the wall clock (suspend, NTP jumps)
+MAX_SLEEP = 3600
+
+def _zone(tz_name):
+    return ZoneInfo(tz_name) if tz_name else None
+
+def _localize(moment, tz):
+    return moment.astimezone(tz) if tz else moment.astimezone()
+
+def _at(year, month, day, hour, minute, tz):
+    if tz:
+        return datetime(year, month, day, hour, minute, tzinfo=tz)
+    return datetime(year, month, day, hour, minute).astimezone()
+
+class WeeklySchedule:
+    def __init__(self, weekday, hour, minute=0, tz_name=None):
+        self.weekday = weekday
+        self.hour = hour
+        self.minute = minute
+        self.tz_name = tz_name
+
+    def key(self):
+        return f'weekly:{self.weekday}:{self.hour}:{self.minute}:{self.tz_name or "local"}'
+
+    def next_after(self, moment):
+        tz = _zone(self.tz_name)
+        local = _localize(moment, tz)
+        day = local.date() + timedelta(days=(self.weekday - local.weekday()) % 7)
+        candidate = _at(day.year, day.month, day.day, self.hour, self.minute, tz)
+        if candidate <= local:
+            day += timedelta(days=7)
+            candidate = _at(day.year, day.month, day.day, self.hour, self.minute, tz)
+        return candidate
+
+class MonthlySchedule:
+    def __init__(self, day, hour, minute=0, tz_name=None):
+        self.day = day
+        self.hour = hour
+        self.minute = minute
+        self.tz_name = tz_name
+
+    def key(self):
+        return f'monthly:{self.day}:{self.hour}:{self.minute}:{self.tz_name or "local"}'
+
+    def next_after(self, moment):
+        tz = _zone(self.tz_name)
+        local = _localize(moment, tz)
+        year, month = local.year, local.month
+        candidate = _at(year, month, self.day, self.hour, self.minute, tz)
+        if candidate <= local:
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+            candidate = _at(year, month, self.day, self.hour, self.minute, tz)
+        return candidate
+
+class _Job:
+    def __init__(self, job_id, schedule, callback, misfire_grace, batch, payload, version):
+        self.job_id = job_id
+        self.schedule = schedule
+        self.callback = callback
+        self.misfire_grace = misfire_grace
+        self.batch = batch
+        self.payload = payload
+        self.version = version
+
+class Scheduler:
+    """Single-task job scheduler backed by a heap of next-fire times.
+
+    The loop sleeps until the earliest job is due, so there is no polling
+    per job or per guild. Next-fire times are persisted before a job runs;
+    after a restart, runs that were missed while offline fire once on
+    registration, unless they are older than the job's misfire grace.
+    State changes made in the same loop iteration (e.g. every guild
+    registering its jobs on ready) are written once, in the executor.
+    Jobs registered with the same `batch` name that fall due at the same
+    moment fire as one call, so per-guild jobs can share a single fan-out.
+    """
+
+    def __init__(self, state_path):
+        self.state_path = state_path
+        self._jobs = {}
+        self._heap = []
+        self._versions = 0
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self._running = set()
+        self._state = {}
+        self._dirty = False
+        self._save_task = None
+        self._write_lock = threading.Lock()
+        if os.path.exists(self.state_path):
+            with open(self.state_path, 'r') as f:
+                self._state = json.load(f)
+
+    def _write_state(self, text):
+        with self._write_lock:
+            os.makedirs(os.path.dirname(self.state_path) or '.', exist_ok=True)
+            tmp_path = f'{self.state_path}.tmp'
+            with open(tmp_path, 'w') as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.state_path)
+
+    def _save_state(self):
+        self._dirty = True
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop (scripts): write straight away
+            self.flush_sync()
+            return
+        if self._save_task is None or self._save_task.done():
+            self._save_task = loop.create_task(self._save_loop(), name='scheduler-save')
+
+    async def _save_loop(self):
+        loop = asyncio.get_running_loop()
+        while self._dirty:
+            self._dirty = False
+            try:
+                await loop.run_in_executor(None, self._write_state, json.dumps(self._state, indent=4))
+            except OSError as e:
+                print(f'❌ Error saving scheduler state: {e}')
+
+    async def flush(self):
+        while self._save_task is not None and not self._save_task.done():
+            await asyncio.shield(self._save_task)
+
+    def flush_sync(self):
+        if self._dirty:
+            self._dirty = False
+            self._write_state(json.dumps(self._state, indent=4))
+
+    def _push(self, job, next_run):
+        self._state[job.job_id] = {'schedule': job.schedule.key(), 'next_run': next_run.timestamp()}
+        heapq.heappush(self._heap, (next_run.timestamp(), job.job_id, job.version))
+
+    def add_job(self, job_id, schedule, callback, misfire_grace=None, batch=None, payload=None):
+        """Register or replace a job. `callback(due)` is awaited when it fires.
+
+        Jobs of a `batch` due at the same time are fired together, as a single
+        `callback(due, payloads)` with the `payload` of each of them.
+        """
+        self._versions += 1
+        job = _Job(job_id, schedule, callback, misfire_grace, batch, payload, self._versions)
+        self._jobs[job_id] = job
+
+        stored = self._state.get(job_id)
+        now = datetime.now(timezone.utc)
+        if stored and stored['schedule'] == schedule.key():
+            # Keep the persisted time, even if it passed while we were offline
+            next_run = datetime.fromtimestamp(stored['next_run'], timezone.utc)
+        else:
+            next_run = schedule.next_after(now)
+
+        self._push(job, next_run)
+        self._save_state()
+        self._wakeup.set()
+
+    def remove_job(self, job_id, keep_state=False):
+        """Unregister a job; with `keep_state` its next run stays persisted for catch-up."""
+        # Heap entries of removed jobs are dropped lazily when they surface
+        if self._jobs.pop(job_id, None) is not None and not keep_state:
+            self._state.pop(job_id, None)
+            self._save_state()
+
+    def next_run(self, job_id):
+        stored = self._state.get(job_id)
+        return datetime.fromtimestamp(stored['next_run'], timezone.utc) if stored else None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name='scheduler')
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        # Whatever the save task hasn't picked up yet is written now
+        self.flush_sync()
+
+    def _is_current(self, job_id, version):
+        job = self._jobs.get(job_id)
+        return job is not None and job.version == version
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            while self._heap and not self._is_current(*self._heap[0][1:]):
+                heapq.heappop(self._heap)
+
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+
+            due_ts = self._heap[0][0]
+            delay = due_ts - time.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=min(delay, MAX_SLEEP))
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            now = datetime.now(timezone.utc)
+            due_jobs = []
+            while self._heap and self._heap[0][0] <= now.timestamp():
+                due_ts, job_id, version = heapq.heappop(self._heap)
+                if self._is_current(job_id, version):
+                    due_jobs.append((datetime.fromtimestamp(due_ts, timezone.utc), self._jobs[job_id]))
+
+            # Persist the next slots first so a crash mid-job never runs one twice
+            for _, job in due_jobs:
+                self._push(job, job.schedule.next_after(now))
+            self._save_state()
+            await self.flush()
+
+            batches = {}
+            for due, job in due_jobs:
+                lateness = (now - due).total_seconds()
+                if job.misfire_grace is not None and lateness > job.misfire_grace:
+                    print(f'⏭️ Skipped {job.job_id}: missed by {lateness:.0f}s')
+                    continue
+                if job.batch is None:
+                    self._spawn(f'job:{job.job_id}', job.callback, due)
+                else:
+                    batches.setdefault((job.batch, due), []).append(job)
+
+            for (batch, due), jobs in batches.items():
+                self._spawn(f'batch:{batch}', jobs[0].callback, due, [job.payload for job in jobs])
+
+    def _spawn(self, name, callback, *args):
+        task = asyncio.create_task(self._fire(name, callback, *args), name=name)
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _fire(self, name, callback, *args):
+        try:
+            await callback(*args)
+        except Exception as e:
+            print(f'❌ Scheduled {name} failed: {e}')
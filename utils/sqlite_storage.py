@@ -0,0 +1,389 @@
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+from utils.constants import DATA_DIR, SQLITE_FILE
+from utils.metrics import timed
+from utils.ranking import RankSnapshot
+from utils.storage import Storage
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    user_id TEXT PRIMARY KEY,
+    username TEXT NOT NULL,
+    xp INTEGER NOT NULL DEFAULT 0,
+    total_xp INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_users_rank ON users (xp DESC, user_id);
+
+CREATE TABLE IF NOT EXISTS weekly_xp (
+    user_id TEXT NOT NULL,
+    week_key TEXT NOT NULL,
+    xp INTEGER NOT NULL,
+    PRIMARY KEY (user_id, week_key)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_weekly_xp_week ON weekly_xp (week_key);
+
+CREATE TABLE IF NOT EXISTS badges (
+    user_id TEXT NOT NULL,
+    badge TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (user_id, badge)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS challenges (
+    id INTEGER PRIMARY KEY,
+    status TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_challenges_status ON challenges (status, id);
+
+CREATE TABLE IF NOT EXISTS submissions (
+    challenge_id INTEGER NOT NULL,
+    message_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    channel_id INTEGER NOT NULL,
+    submitted_at TEXT,
+    UNIQUE (challenge_id, message_id)
+);
+CREATE INDEX IF NOT EXISTS idx_submissions_challenge ON submissions (challenge_id);
+
+CREATE TABLE IF NOT EXISTS monthly_archive (
+    month_key TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    username TEXT NOT NULL,
+    xp INTEGER NOT NULL,
+    PRIMARY KEY (month_key, user_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS all_time (
+    user_id TEXT PRIMARY KEY,
+    username TEXT NOT NULL,
+    total_xp INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_all_time_rank ON all_time (total_xp DESC, user_id);
+"""
+
+class SQLiteDataManager(Storage):
+    """DataManager backend on a local SQLite database in WAL mode.
+
+    Nothing is cached in Python: rankings, top-k and all-time totals are
+    answered by indexed queries, so memory use stays flat as guilds grow.
+    Only opening the database happens on a worker thread; queries and
+    commits run on the event loop. With WAL and `synchronous=NORMAL` a
+    commit is an append to the WAL file without an fsync.
+    """
+
+    def __init__(self, data_dir=DATA_DIR):
+        self.data_dir = data_dir
+        os.makedirs(self.data_dir, exist_ok=True)
+
+        self.db_path = os.path.join(self.data_dir, SQLITE_FILE)
+        # Autocommit mode; multi-statement changes go through transaction().
+        # Shards may be opened on a worker thread, then are only used from the loop
+        self.conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+        self._txn_depth = 0
+
+    @contextmanager
+    def transaction(self):
+        if self._txn_depth == 0:
+            self.conn.execute('BEGIN IMMEDIATE')
+        self._txn_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._txn_depth -= 1
+            if self._txn_depth == 0:
+                self.conn.execute('ROLLBACK')
+            raise
+        self._txn_depth -= 1
+        if self._txn_depth == 0:
+            with timed('storage_commit_seconds'):
+                self.conn.execute('COMMIT')
+
+    def close(self):
+        self.conn.close()
+
+    @property
+    def version(self):
+        # Rows written through this connection; every mutation moves it
+        return self.conn.total_changes
+
+    def _user_dicts(self, rows):
+        users = {
+            row['user_id']: {
+                'username': row['username'],
+                'xp': row['xp'],
+                'weekly_xp': {},
+                'total_xp': row['total_xp'],
+                'badges': []
+            }
+            for row in rows
+        }
+        if not users:
+            return users
+
+        placeholders = ','.join('?' * len(users))
+        ids = list(users)
+        for row in self.conn.execute(
+            f'SELECT user_id, week_key, xp FROM weekly_xp WHERE user_id IN ({placeholders})', ids
+        ):
+            users[row['user_id']]['weekly_xp'][row['week_key']] = row['xp']
+        for row in self.conn.execute(
+            f'SELECT user_id, badge FROM badges WHERE user_id IN ({placeholders}) ORDER BY position', ids
+        ):
+            users[row['user_id']]['badges'].append(row['badge'])
+        return users
+
+    # Users
+    def ensure_user(self, user_id, username):
+        self.conn.execute(
+            'INSERT INTO users (user_id, username) VALUES (?, ?) '
+            'ON CONFLICT (user_id) DO UPDATE SET username = excluded.username',
+            (str(user_id), username)
+        )
+
+    def add_xp(self, user_id, amount, week_key):
+        user_id = str(user_id)
+        with self.transaction():
+            cursor = self.conn.execute(
+                'UPDATE users SET xp = xp + ?, total_xp = total_xp + ? WHERE user_id = ?',
+                (amount, amount, user_id)
+            )
+            if cursor.rowcount == 0:
+                raise KeyError(user_id)
+            self.conn.execute(
+                'INSERT INTO weekly_xp (user_id, week_key, xp) VALUES (?, ?, ?) '
+                'ON CONFLICT (user_id, week_key) DO UPDATE SET xp = xp + excluded.xp',
+                (user_id, week_key, amount)
+            )
+
+    def remove_xp(self, user_id, amount):
+        cursor = self.conn.execute(
+            'UPDATE users SET xp = MAX(0, xp - ?) WHERE user_id = ?', (amount, str(user_id))
+        )
+        if cursor.rowcount == 0:
+            raise KeyError(str(user_id))
+
+    def add_badge(self, user_id, badge):
+        user_id = str(user_id)
+        self.conn.execute(
+            'INSERT OR IGNORE INTO badges (user_id, badge, position) '
+            'SELECT ?, ?, COALESCE(MAX(position) + 1, 0) FROM badges WHERE user_id = ?',
+            (user_id, badge, user_id)
+        )
+
+    def get_user(self, user_id):
+        rows = self.conn.execute(
+            'SELECT user_id, username, xp, total_xp FROM users WHERE user_id = ?', (str(user_id),)
+        ).fetchall()
+        return self._user_dicts(rows).get(str(user_id))
+
+    def get_leaderboard(self):
+        return self._user_dicts(self.conn.execute('SELECT user_id, username, xp, total_xp FROM users'))
+
+    def get_user_rank(self, user_id):
+        row = self.conn.execute('SELECT xp FROM users WHERE user_id = ?', (str(user_id),)).fetchone()
+        if row is None:
+            return 0
+        # Same ordering as the JSON backend: XP descending, then user id
+        return self.conn.execute(
+            'SELECT COUNT(*) FROM users WHERE xp > ? OR (xp = ? AND user_id < ?)',
+            (row['xp'], row['xp'], str(user_id))
+        ).fetchone()[0] + 1
+
+    def get_top_users(self, limit=10):
+        rows = self.conn.execute(
+            'SELECT user_id, username, xp, total_xp FROM users ORDER BY xp DESC, user_id LIMIT ?', (limit,)
+        ).fetchall()
+        users = self._user_dicts(rows)
+        return [(row['user_id'], users[row['user_id']]) for row in rows]
+
+    def get_leaderboard_snapshot(self):
+        return RankSnapshot(tuple(row) for row in self.conn.execute(
+            'SELECT user_id, username, xp, '
+            '(SELECT COUNT(*) FROM badges b WHERE b.user_id = users.user_id) '
+            'FROM users ORDER BY xp DESC, user_id'
+        ))
+
+    def get_period_snapshot(self, first_week, last_week):
+        # ISO `YYYY-Www` keys sort chronologically; legacy `week_<n>` keys fall outside
+        return RankSnapshot(tuple(row) for row in self.conn.execute(
+            'SELECT w.user_id, u.username, SUM(w.xp) AS period_xp, '
+            '(SELECT COUNT(*) FROM badges b WHERE b.user_id = w.user_id) '
+            'FROM weekly_xp w JOIN users u ON u.user_id = w.user_id '
+            'WHERE w.week_key BETWEEN ? AND ? '
+            'GROUP BY w.user_id HAVING period_xp > 0 ORDER BY period_xp DESC, w.user_id',
+            (first_week, last_week)
+        ))
+
+    # Monthly archives
+    def reset_monthly_leaderboard(self, month_key=None):
+        month_key = month_key or self.get_month_key()
+        with self.transaction():
+            # Archiving a month again adds to it; the XP archived earlier is already zeroed
+            self.conn.execute(
+                'INSERT INTO monthly_archive (month_key, user_id, username, xp) '
+                'SELECT ?, user_id, username, xp FROM users WHERE true '
+                'ON CONFLICT (month_key, user_id) DO UPDATE SET '
+                'xp = xp + excluded.xp, username = excluded.username',
+                (month_key,)
+            )
+            self.conn.execute(
+                'INSERT INTO all_time (user_id, username, total_xp) '
+                'SELECT user_id, username, xp FROM users WHERE true '
+                'ON CONFLICT (user_id) DO UPDATE SET '
+                'total_xp = total_xp + excluded.total_xp, username = excluded.username'
+            )
+            self.conn.execute('UPDATE users SET xp = 0')
+
+    def get_archived_months(self):
+        return [row[0] for row in self.conn.execute(
+            'SELECT DISTINCT month_key FROM monthly_archive ORDER BY month_key'
+        )]
+
+    def get_month_archive(self, month_key):
+        rows = self.conn.execute(
+            'SELECT user_id, username, xp FROM monthly_archive WHERE month_key = ?', (month_key,)
+        ).fetchall()
+        if not rows:
+            return None
+        return {row['user_id']: {'username': row['username'], 'xp': row['xp']} for row in rows}
+
+    def get_all_time_top(self, limit=10):
+        return [
+            (row['user_id'], {'username': row['username'], 'total_xp': row['total_xp']})
+            for row in self.conn.execute(
+                'SELECT user_id, username, total_xp FROM all_time ORDER BY total_xp DESC, user_id LIMIT ?',
+                (limit,)
+            )
+        ]
+
+    def get_all_time_snapshot(self):
+        return RankSnapshot(tuple(row) for row in self.conn.execute(
+            'SELECT user_id, username, total_xp FROM all_time ORDER BY total_xp DESC, user_id'
+        ))
+
+    # Challenges
+    def _challenge(self, row):
+        return json.loads(row['data']) if row else None
+
+    def create_challenge(self, challenge_data):
+        with self.transaction():
+            challenge_id = self.conn.execute('SELECT COUNT(*) FROM challenges').fetchone()[0] + 1
+            challenge_data['id'] = challenge_id
+            challenge_data.pop('submissions', None)
+            self.conn.execute(
+                'INSERT INTO challenges (id, status, data) VALUES (?, ?, ?)',
+                (challenge_id, challenge_data.get('status'), json.dumps(challenge_data))
+            )
+        return challenge_id
+
+    def update_challenge(self, challenge_id, updates):
+        with self.transaction():
+            challenge = self.get_challenge(challenge_id)
+            if challenge is None:
+                return False
+            challenge.update(updates)
+            self.conn.execute(
+                'UPDATE challenges SET status = ?, data = ? WHERE id = ?',
+                (challenge.get('status'), json.dumps(challenge), challenge_id)
+            )
+        return True
+
+    def get_challenge(self, challenge_id):
+        return self._challenge(self.conn.execute(
+            'SELECT data FROM challenges WHERE id = ?', (challenge_id,)
+        ).fetchone())
+
+    def get_active_challenge(self):
+        return self._challenge(self.conn.execute(
+            "SELECT data FROM challenges WHERE status = 'active' ORDER BY id DESC LIMIT 1"
+        ).fetchone())
+
+    def get_latest_challenge(self):
+        return self._challenge(self.conn.execute(
+            'SELECT data FROM challenges ORDER BY id DESC LIMIT 1'
+        ).fetchone())
+
+    def get_submissions(self, challenge_id):
+        return [dict(row) for row in self.conn.execute(
+            'SELECT user_id, message_id, channel_id, submitted_at FROM submissions '
+            'WHERE challenge_id = ? ORDER BY rowid',
+            (challenge_id,)
+        )]
+
+    def add_submission(self, challenge_id, submission_data):
+        with self.transaction():
+            if self.get_challenge(challenge_id) is None:
+                return False
+            self.conn.execute(
+                'INSERT OR IGNORE INTO submissions (challenge_id, message_id, user_id, channel_id, submitted_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (challenge_id, submission_data['message_id'], submission_data['user_id'],
+                 submission_data['channel_id'], submission_data.get('submitted_at'))
+            )
+        return True
+
+    # Migration
+    def import_json(self, source):
+        """Copy everything from a JSON DataManager into this database."""
+        with self.transaction():
+            for user_id, data in source.leaderboard.items():
+                self.conn.execute(
+                    'INSERT INTO users (user_id, username, xp, total_xp) VALUES (?, ?, ?, ?)',
+                    (user_id, data['username'], data['xp'], data['total_xp'])
+                )
+                self.conn.executemany(
+                    'INSERT INTO weekly_xp (user_id, week_key, xp) VALUES (?, ?, ?)',
+                    [(user_id, week_key, xp) for week_key, xp in data.get('weekly_xp', {}).items()]
+                )
+                self.conn.executemany(
+                    'INSERT OR IGNORE INTO badges (user_id, badge, position) VALUES (?, ?, ?)',
+                    [(user_id, badge, position) for position, badge in enumerate(data.get('badges', []))]
+                )
+
+            for challenge in source.challenges:
+                self.conn.execute(
+                    'INSERT INTO challenges (id, status, data) VALUES (?, ?, ?)',
+                    (challenge['id'], challenge.get('status'), json.dumps(challenge))
+                )
+                for sub in source.get_submissions(challenge['id']):
+                    self.conn.execute(
+                        'INSERT OR IGNORE INTO submissions '
+                        '(challenge_id, message_id, user_id, channel_id, submitted_at) VALUES (?, ?, ?, ?, ?)',
+                        (challenge['id'], sub['message_id'], sub['user_id'],
+                         sub['channel_id'], sub.get('submitted_at'))
+                    )
+
+            for month_key in source.get_archived_months():
+                self.conn.executemany(
+                    'INSERT INTO monthly_archive (month_key, user_id, username, xp) VALUES (?, ?, ?, ?)',
+                    [(month_key, user_id, data['username'], data['xp'])
+                     for user_id, data in (source.get_month_archive(month_key) or {}).items()]
+                )
+            self.conn.executemany(
+                'INSERT INTO all_time (user_id, username, total_xp) VALUES (?, ?, ?)',
+                [(user_id, data['username'], data['total_xp'])
+                 for user_id, data in source.all_time['users'].items()]
+            )
+
+def migrate_from_json(data_dir=DATA_DIR):
+    from utils.data_manager import DataManager
+
+    target = SQLiteDataManager(data_dir)
+    if target.conn.execute('SELECT EXISTS (SELECT 1 FROM users UNION ALL SELECT 1 FROM challenges)').fetchone()[0]:
+        target.close()
+        raise RuntimeError(f'{target.db_path} already holds data; refusing to migrate over it')
+
+    target.import_json(DataManager(data_dir))
+    target.close()
+    return target.db_path
+
+if __name__ == '__main__':
+    print(f'✅ Migrated JSON data into {migrate_from_json()}')
@@ -0,0 +1,116 @@
+from datetime import datetime
+from utils.constants import STORAGE_FORMAT
+
+class Storage:
+    """Interface shared by every DataManager backend.
+
+    The cogs only call these methods, so a backend can be swapped through
+    STORAGE_BACKEND without touching them. User records read like the
+    original leaderboard.json entries (`user['xp']`, `user.get('weekly_xp')`)
+    but are read-only views: the JSON backend returns UserRecords whose
+    `weekly_xp` and `badges` are built on every access, and the SQLite one
+    builds fresh dicts per query, so mutating a record is silently lost.
+    Every change goes through the mutation methods below.
+    """
+
+    # Changes whenever stored data does; render caches are keyed on it
+    version = 0
+
+    def close(self):
+        """Persist anything pending and release open files or connections."""
+
+    def get_month_key(self):
+        now = datetime.now()
+        return f"{now.year}-{now.month:02d}"
+
+    # Users
+    def ensure_user(self, user_id, username):
+        raise NotImplementedError
+
+    def add_xp(self, user_id, amount, week_key):
+        raise NotImplementedError
+
+    def remove_xp(self, user_id, amount):
+        raise NotImplementedError
+
+    def add_badge(self, user_id, badge):
+        raise NotImplementedError
+
+    def get_user(self, user_id):
+        raise NotImplementedError
+
+    def get_leaderboard(self):
+        raise NotImplementedError
+
+    def get_user_rank(self, user_id):
+        raise NotImplementedError
+
+    def get_top_users(self, limit=10):
+        raise NotImplementedError
+
+    def get_leaderboard_snapshot(self):
+        """RankSnapshot of `(user_id, username, xp, badge_count)` rows."""
+        raise NotImplementedError
+
+    def get_period_snapshot(self, first_week, last_week):
+        """Like get_leaderboard_snapshot, ranked by XP earned in an ISO week range."""
+        raise NotImplementedError
+
+    # Monthly archives
+    def reset_monthly_leaderboard(self, month_key=None):
+        """Archive the leaderboard under `month_key` (default: this month) and zero it."""
+        raise NotImplementedError
+
+    def get_archived_months(self):
+        raise NotImplementedError
+
+    def get_month_archive(self, month_key):
+        raise NotImplementedError
+
+    def get_all_time_top(self, limit=10):
+        raise NotImplementedError
+
+    def get_all_time_snapshot(self):
+        """RankSnapshot of `(user_id, username, total_xp)` rows."""
+        raise NotImplementedError
+
+    # Challenges
+    def create_challenge(self, challenge_data):
+        raise NotImplementedError
+
+    def update_challenge(self, challenge_id, updates):
+        raise NotImplementedError
+
+    def get_challenge(self, challenge_id):
+        raise NotImplementedError
+
+    def get_active_challenge(self):
+        raise NotImplementedError
+
+    def get_latest_challenge(self):
+        raise NotImplementedError
+
+    def get_submissions(self, challenge_id):
+        raise NotImplementedError
+
+    def add_submission(self, challenge_id, submission_data):
+        raise NotImplementedError
+
+    # Persistence
+    def transaction(self):
+        raise NotImplementedError
+
+    async def flush(self):
+        pass
+
+    def flush_sync(self):
+        pass
+
+def create_data_manager(backend, data_dir, storage_format=STORAGE_FORMAT):
+    if backend == 'json':
+        from utils.data_manager import DataManager
+        return DataManager(data_dir, storage_format)
+    if backend == 'sqlite':
+        from utils.sqlite_storage import SQLiteDataManager
+        return SQLiteDataManager(data_dir)
+    raise ValueError(f'Unknown storage backend: {backend}')
@@ -0,0 +1,113 @@
+import json
+import os
+from collections import OrderedDict
+from utils.journal import read_lines, truncate_torn_tail
+
+class SubmissionStore:
+    """Per-challenge, append-only submission logs.
+
+    Each challenge gets its own `<challenge_id>.jsonl`, so recording a
+    submission appends one line instead of rewriting every challenge. Logs
+    are read on first use and kept in a small LRU cache.
+    """
+
+    def __init__(self, directory, cache_size):
+        self.directory = directory
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._pending = {}
+        self._writing = {}
+        # Logs already checked for a torn tail by this process (write() runs off the loop)
+        self._intact = set()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, challenge_id):
+        return os.path.join(self.directory, f'{challenge_id}.jsonl')
+
+    def _load(self, challenge_id):
+        if challenge_id in self._cache:
+            self._cache.move_to_end(challenge_id)
+            return self._cache[challenge_id]
+
+        path = self._path(challenge_id)
+        stored = read_lines(path)[0] if os.path.exists(path) else []
+
+        # Submissions queued or mid-write belong to the log as well
+        submissions, message_ids = [], set()
+        for sub in stored + self._writing.get(challenge_id, []) + self._pending.get(challenge_id, []):
+            if sub['message_id'] not in message_ids:
+                submissions.append(sub)
+                message_ids.add(sub['message_id'])
+
+        entry = (submissions, message_ids)
+        self._cache[challenge_id] = entry
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return entry
+
+    def get(self, challenge_id):
+        return self._load(challenge_id)[0]
+
+    def add(self, challenge_id, submission):
+        submissions, message_ids = self._load(challenge_id)
+        if submission['message_id'] in message_ids:
+            return False
+        submissions.append(submission)
+        message_ids.add(submission['message_id'])
+        return True
+
+    def remove(self, challenge_id, submission):
+        submissions, message_ids = self._load(challenge_id)
+        if submission in submissions:
+            submissions.remove(submission)
+            message_ids.discard(submission['message_id'])
+        pending = self._pending.get(challenge_id, [])
+        if submission in pending:
+            pending.remove(submission)
+
+    def queue(self, challenge_id, submission):
+        self._pending.setdefault(challenge_id, []).append(submission)
+
+    def has_pending(self):
+        return bool(self._pending)
+
+    def take_pending(self):
+        pending, self._pending = self._pending, {}
+        for challenge_id, subs in pending.items():
+            self._writing.setdefault(challenge_id, []).extend(subs)
+        return {
+            challenge_id: [json.dumps(sub, separators=(',', ':')) + '\n' for sub in subs]
+            for challenge_id, subs in pending.items()
+        }
+
+    def write(self, pending):
+        for challenge_id, lines in pending.items():
+            if not lines:
+                continue
+            path = self._path(challenge_id)
+            if challenge_id not in self._intact:
+                if os.path.exists(path):
+                    truncate_torn_tail(path, read_lines(path)[1])
+                self._intact.add(challenge_id)
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(''.join(lines))
+                f.flush()
+                os.fsync(f.fileno())
+            self._writing.pop(challenge_id, None)
+
+    def migrate(self, challenges):
+        """Move submissions embedded in challenges.json into their own logs.
+
+        Returns True when any challenge was changed.
+        """
+        changed = False
+        for challenge in challenges:
+            if 'submissions' not in challenge:
+                continue
+            submissions = challenge.pop('submissions')
+            changed = True
+            if submissions and not os.path.exists(self._path(challenge['id'])):
+                self.write({challenge['id']: [
+                    json.dumps(sub, separators=(',', ':')) + '\n' for sub in submissions
+                ]})
+        return changed
@@ -0,0 +1,57 @@
+import discord
+
+class PaginatorView(discord.ui.View):
+    """Previous/next buttons over pages rendered by `render_page(page)`.
+
+    Pages are rendered from data the caller already has, so flipping pages
+    never touches DataManager or the Discord API beyond the edit itself.
+    With `find_page`, a jump button moves straight to the page it returns
+    (e.g. the one holding the caller's rank); without it the button is hidden.
+    """
+
+    def __init__(self, render_page, page_count, owner_id, timeout=180, find_page=None):
+        super().__init__(timeout=timeout)
+        self.render_page = render_page
+        self.page_count = page_count
+        self.owner_id = owner_id
+        self.find_page = find_page
+        self.page = 0
+        if find_page is None:
+            self.remove_item(self.jump_page)
+        self._sync_buttons()
+
+    def _sync_buttons(self):
+        self.previous_page.disabled = self.page <= 0
+        self.next_page.disabled = self.page >= self.page_count - 1
+        self.page_label.label = f'{self.page + 1}/{self.page_count}'
+
+    async def interaction_check(self, interaction: discord.Interaction):
+        if interaction.user.id != self.owner_id:
+            await interaction.response.send_message('❌ This menu belongs to someone else.', ephemeral=True)
+            return False
+        return True
+
+    async def show_page(self, interaction: discord.Interaction, page):
+        self.page = max(0, min(page, self.page_count - 1))
+        self._sync_buttons()
+        await interaction.response.edit_message(embed=self.render_page(self.page), view=self)
+
+    @discord.ui.button(label='◀', style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show_page(interaction, self.page - 1)
+
+    @discord.ui.button(label='1/1', style=discord.ButtonStyle.secondary, disabled=True)
+    async def page_label(self, interaction: discord.Interaction, button: discord.ui.Button):
+        pass
+
+    @discord.ui.button(label='▶', style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show_page(interaction, self.page + 1)
+
+    @discord.ui.button(label='📍 Me', style=discord.ButtonStyle.primary)
+    async def jump_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        page = self.find_page()
+        if page is None:
+            await interaction.response.send_message('❌ You are not ranked yet!', ephemeral=True)
+            return
+        await self.show_page(interaction, page)
@@ -0,0 +1,107 @@
+import re
+from datetime import date, datetime
+import numpy as np
+
+_ISO_WEEK_KEY = re.compile(r'(\d{4})-W(\d{2})$')
+
+def week_key(year, week):
+    return f'{year}-W{week:02d}'
+
+def current_week_key(moment=None):
+    year, week, _ = (moment or datetime.now()).isocalendar()
+    return week_key(year, week)
+
+def challenge_week_key(challenge):
+    # Challenges posted before weeks carried a year get it from posted_at
+    year = challenge.get('year')
+    if year is None and challenge.get('posted_at'):
+        year = datetime.fromisoformat(challenge['posted_at']).isocalendar()[0]
+    return week_key(year or datetime.now().isocalendar()[0], challenge['week'])
+
+def parse_week_key(key):
+    """Return (year, week) for an ISO `YYYY-Www` key, None for anything else."""
+    match = _ISO_WEEK_KEY.match(key)
+    if match is None:
+        return None
+    year, week = int(match.group(1)), int(match.group(2))
+    try:
+        date.fromisocalendar(year, week, 1)
+    except ValueError:
+        return None
+    return year, week
+
+def week_ordinal(year, week):
+    # Consecutive weeks get consecutive numbers, across year boundaries too
+    return date.fromisocalendar(year, week, 1).toordinal() // 7
+
+def shift_week_key(key, weeks):
+    year, week = parse_week_key(key)
+    monday = date.fromordinal((week_ordinal(year, week) + weeks) * 7 + 1)
+    return current_week_key(monday)
+
+class XPSeries:
+    """Columnar log of (user, ISO week, XP) entries for period rankings.
+
+    Every award appends one row to three NumPy columns; the same user and
+    week may appear many times. A ranking over any week range is a single
+    mask + bincount over the columns, with no Python loop over users.
+    Truncating back to an earlier length undoes appends (transaction
+    rollback).
+    """
+
+    def __init__(self, capacity=1024):
+        self._users = np.empty(capacity, dtype=np.int32)
+        self._weeks = np.empty(capacity, dtype=np.int32)
+        self._xp = np.empty(capacity, dtype=np.int64)
+        self._length = 0
+        self._user_ids = []
+        self._user_index = {}
+
+    def __len__(self):
+        return self._length
+
+    def _grow(self):
+        capacity = len(self._users) * 2
+        for name in ('_users', '_weeks', '_xp'):
+            column = getattr(self, name)
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:self._length] = column[:self._length]
+            setattr(self, name, grown)
+
+    def add(self, user_id, key, amount):
+        parsed = parse_week_key(key)
+        if parsed is None:
+            # Legacy `week_<n>` keys have no year and can't be placed in time
+            return
+        index = self._user_index.get(user_id)
+        if index is None:
+            index = self._user_index[user_id] = len(self._user_ids)
+            self._user_ids.append(user_id)
+        if self._length == len(self._users):
+            self._grow()
+        self._users[self._length] = index
+        self._weeks[self._length] = week_ordinal(*parsed)
+        self._xp[self._length] = amount
+        self._length += 1
+
+    def truncate(self, length):
+        self._length = min(self._length, length)
+
+    def totals(self, first_key, last_key):
+        """[(user_id, xp)] for the inclusive week range, highest XP first."""
+        first, last = week_ordinal(*parse_week_key(first_key)), week_ordinal(*parse_week_key(last_key))
+        weeks = self._weeks[:self._length]
+        mask = (weeks >= first) & (weeks <= last)
+        sums = np.bincount(
+            self._users[:self._length][mask],
+            weights=self._xp[:self._length][mask],
+            minlength=len(self._user_ids)
+        ).astype(np.int64)
+
+        ranked = np.flatnonzero(sums > 0)
+        if not len(ranked):
+            return []
+        # Same tie-break as RankIndex: XP descending, then user id
+        ids = np.array(self._user_ids, dtype=str)[ranked]
+        order = ranked[np.lexsort((ids, -sums[ranked]))]
+        return [(self._user_ids[index], int(sums[index])) for index in order]